@@ -0,0 +1,39 @@
+"""Бенчмарки проектов ya_news и ya_note.
+
+Запускаются из корня репозитория: ``python -m benchmarks.<модуль>``.
+Результаты печатаются в stdout в формате JSON.
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SETTINGS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def setup_django(project):
+    """Подключает проект и настраивает Django."""
+    sys.path.insert(0, str(ROOT / project))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS[project])
+    import django
+    django.setup()
+
+
+def best_of(func, repeat=5):
+    """Лучшее время выполнения func() в секундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(results):
+    print(json.dumps(results, ensure_ascii=False, indent=2))
@@ -0,0 +1,302 @@
+"""Синхронные и асинхронные страницы чтения под uvicorn.
+
+Каждый проект запускается в своём процессе: временная база SQLite
+заполняется так же, как в benchmarks.routes, затем проект дважды
+поднимается под uvicorn — с ROOT_URLCONF ``<проект>.urls`` (sync)
+и ``<проект>.async_urls`` (async). Страницы чтения прогоняются
+асинхронным HTTP-клиентом с keep-alive на нескольких уровнях
+конкурентности; печатаются пропускная способность, p50/p95/p99,
+число ошибок и отношение rps async/sync.
+
+Локальный SQLite отвечает за микросекунды, и на одном ядре выигрыша
+от параллельных потоков почти нет. ``--db-latency-ms`` добавляет
+задержку к каждому SQL-запросу сервера, как у сетевой базы: тогда
+видно, перекрываются ли ожидания БД разных запросов.
+
+Нужен uvicorn (``pip install uvicorn``); без него бенчмарк
+не запускается.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+from benchmarks import SETTINGS, report, setup_django
+from benchmarks.notes_search import vocabulary
+from benchmarks.routes import percentile, seed_news, seed_notes
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+URLCONFS = {
+    'sync': '{package}.urls',
+    'async': '{package}.async_urls',
+}
+
+# Страница чтения: имя, функция номера запроса -> путь и нужен ли вход.
+Page = namedtuple('Page', 'name path login')
+
+
+def cycle(values):
+    return lambda number: values[number % len(values)]
+
+
+def news_pages(author, news_ids):
+    from django.urls import reverse
+
+    detail = cycle([reverse('news:detail', args=[pk]) for pk in news_ids])
+    return [
+        Page('news:home', lambda number: reverse('news:home'), False),
+        Page('news:home (вход)', lambda number: reverse('news:home'), True),
+        Page('news:detail', detail, False),
+    ]
+
+
+def notes_pages(author, extra):
+    from django.urls import reverse
+    from notes.models import Note
+
+    slugs = list(Note.objects.filter(author=author).values_list(
+        'slug', flat=True
+    ))
+    return [
+        Page('notes:list', lambda number: reverse('notes:list'), True),
+        Page('notes:detail', cycle(
+            [reverse('notes:detail', args=[slug]) for slug in slugs]
+        ), True),
+    ]
+
+
+PROJECTS = {
+    'ya_news': (seed_news, news_pages),
+    'ya_note': (seed_notes, notes_pages),
+}
+
+
+def delay_queries(seconds):
+    """Задержка перед каждым SQL-запросом новых соединений."""
+    from django.db.backends.signals import connection_created
+
+    def delayed(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def on_created(sender, connection, **kwargs):
+        connection.execute_wrappers.insert(0, delayed)
+
+    connection_created.connect(on_created, weak=False)
+
+
+def serve(args):
+    """Процесс сервера: проект под uvicorn с нужным ROOT_URLCONF."""
+    setup_django(args.project)
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+
+    if args.db_latency_ms:
+        delay_queries(args.db_latency_ms / 1000)
+    settings.DEBUG = False
+    settings.ROOT_URLCONF = args.urlconf
+    settings.DATABASES['default']['NAME'] = args.database
+    uvicorn.run(
+        get_asgi_application(), host='127.0.0.1', port=args.port,
+        log_level='warning', access_log=False, lifespan='off',
+    )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(project, urlconf, database, db_latency_ms):
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, '-m', 'benchmarks.asgi_views', '--serve',
+        '--project', project, '--urlconf', urlconf,
+        '--database', database, '--port', str(port),
+        '--db-latency-ms', str(db_latency_ms),
+    ])
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit(f'uvicorn не запустился: {project} {urlconf}')
+
+
+async def fetch(reader, writer, path, cookie):
+    """GET по открытому соединению; возвращает код ответа."""
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+        f'Cookie: {cookie}\r\n\r\n'.encode()
+    )
+    status = int((await reader.readline()).split()[1])
+    length, chunked = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'transfer-encoding':
+            chunked = 'chunked' in value
+    if not chunked:
+        await reader.readexactly(length)
+        return status
+    while True:
+        size = int((await reader.readline()).split(b';')[0], 16)
+        await reader.readexactly(size + 2)
+        if not size:
+            return status
+
+
+async def load(port, page, cookie, count, concurrency):
+    """Нагрузка: count запросов по concurrency соединениям с keep-alive."""
+    numbers = iter(range(count))
+    latencies, errors = [], []
+
+    async def client():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            for number in numbers:
+                start = time.perf_counter()
+                status = await fetch(
+                    reader, writer, page.path(number),
+                    cookie if page.login else '',
+                )
+                latencies.append(time.perf_counter() - start)
+                if status >= 400:
+                    errors.append(status)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': count,
+        'errors': len(errors),
+        'rps': round(count / elapsed, 1),
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+    }
+
+
+def run_project(args):
+    """Заполняет базу и прогоняет страницы под обоими URLconf."""
+    setup_django(args.project)
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test import Client
+
+    directory = tempfile.TemporaryDirectory()
+    database = os.path.join(directory.name, 'asgi.sqlite3')
+    connections['default'].close()
+    connections['default'].settings_dict['NAME'] = database
+    call_command('migrate', verbosity=0)
+    seed, build_pages = PROJECTS[args.project]
+    rng = random.Random(args.seed)
+    author, extra = seed(args, rng, vocabulary(rng, args.words))
+    pages = build_pages(author, extra)
+    client = Client()
+    client.force_login(author)
+    cookie = f'sessionid={client.cookies["sessionid"].value}'
+    connections.close_all()
+
+    package = SETTINGS[args.project].split('.')[0]
+    results = {}
+    for mode, urlconf in URLCONFS.items():
+        process, port = start_server(
+            args.project, urlconf.format(package=package), database,
+            args.db_latency_ms,
+        )
+        try:
+            results[mode] = {
+                page.name: {
+                    concurrency: asyncio.run(load(
+                        port, page, cookie, args.requests, concurrency
+                    ))
+                    for concurrency in args.concurrency
+                }
+                for page in pages
+            }
+        finally:
+            process.terminate()
+            process.wait()
+    results['async/sync'] = {
+        page.name: {
+            concurrency: round(
+                results['async'][page.name][concurrency]['rps']
+                / results['sync'][page.name][concurrency]['rps'], 2
+            )
+            for concurrency in args.concurrency
+        }
+        for page in pages
+    }
+    directory.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--project', choices=PROJECTS)
+    parser.add_argument('--news', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=20)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--notes', type=int, default=50)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 16, 64]
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--db-latency-ms', type=float, default=0,
+        help='Задержка каждого SQL-запроса сервера, мс.',
+    )
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--urlconf', help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if uvicorn is None:
+        sys.exit('Для бенчмарка нужен uvicorn: pip install uvicorn')
+    if args.serve:
+        serve(args)
+        return
+    if args.project:
+        print(json.dumps(run_project(args)))
+        return
+
+    results = {}
+    for project in PROJECTS:
+        process = subprocess.run(
+            [
+                sys.executable, '-m', 'benchmarks.asgi_views',
+                '--project', project,
+            ] + sys.argv[1:],
+            stdout=subprocess.PIPE, check=True, text=True,
+        )
+        results[project] = json.loads(process.stdout)
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
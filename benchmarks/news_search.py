@@ -0,0 +1,95 @@
+"""Поиск по новостям и комментариям: индексы FTS5 против icontains.
+
+Новости и комментарии заполняют временную базу SQLite; словарь тот же,
+что в benchmarks.notes_search. Для слов разной частоты замеряется
+первая страница search_news() и запасного поиска по icontains.
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks import best_of, report, setup_django
+from benchmarks.notes_search import QUERY_RANKS, phrases, vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--news', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--words', type=int, default=50000)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django('ya_news')
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connections
+    from news.models import Comment, News
+    from news.search import fallback_search, search_news
+
+    directory = tempfile.TemporaryDirectory()
+    connections['default'].close()
+    connections['default'].settings_dict['NAME'] = os.path.join(
+        directory.name, 'news.sqlite3'
+    )
+    call_command('migrate', verbosity=0)
+    author = get_user_model().objects.create_user(username='author')
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng, args.words)
+    titles = phrases(rng, words, 2, 6)
+    texts = phrases(rng, words, 30, 120)
+    comments = phrases(rng, words, 3, 30)
+    start_date = date(2020, 1, 1)
+    for start in range(0, args.news, args.batch):
+        News.objects.bulk_create(
+            News(
+                title=next(titles),
+                text=next(texts),
+                date=start_date + timedelta(days=number % 1500),
+            )
+            for number in range(start, min(start + args.batch, args.news))
+        )
+    for start in range(0, args.comments, args.batch):
+        Comment.objects.bulk_create(
+            Comment(
+                news_id=rng.randint(1, args.news),
+                author=author,
+                text=next(comments),
+            )
+            for _ in range(start, min(start + args.batch, args.comments))
+        )
+
+    date_from = start_date + timedelta(days=1000)
+    results = {
+        'news': args.news,
+        'comments': args.comments,
+        'per_page': args.per_page,
+        'queries': {},
+    }
+    for rank in QUERY_RANKS:
+        query = words[rank - 1]
+        fts = best_of(lambda: search_news(query, args.per_page), 3)
+        fts_dated = best_of(
+            lambda: search_news(query, args.per_page, date_from=date_from), 3
+        )
+        icontains = best_of(
+            lambda: list(fallback_search(query, None, None)[:args.per_page]),
+            3,
+        )
+        results['queries'][f'{rank}:{query}'] = {
+            'fts_ms': round(fts * 1000, 2),
+            'fts_dated_ms': round(fts_dated * 1000, 2),
+            'icontains_ms': round(icontains * 1000, 2),
+        }
+    connections['default'].close()
+    directory.cleanup()
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
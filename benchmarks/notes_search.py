@@ -0,0 +1,115 @@
+"""Поиск по заметкам: индекс FTS5 против icontains.
+
+Заметки --authors авторов заполняют временную базу SQLite, поиск
+идёт по заметкам одного из них: общий индекс не должен ранжировать
+чужие совпадения. Слова
+собираются из слогов, их частоты подчиняются закону Ципфа; запросы
+берутся среди слов разной частоты — от частых до редких. Для каждого
+замеряется время search_notes() и фильтра по icontains по заголовку
+и тексту с тем же лимитом.
+"""
+import argparse
+import os
+import random
+import tempfile
+from itertools import accumulate
+
+from benchmarks import best_of, report, setup_django
+
+SYLLABLES = (
+    'ба ве ги до ку ла ми но пе ро су та фу хо це ча ши ще эм ют як '
+    'бор вил гар дом жук зар кит лес мох нор пар рог сад тон хор шар'
+).split()
+
+# Ранги слов, по которым ищем: от самых частых до редких.
+QUERY_RANKS = (1, 10, 100, 1000, 10000)
+
+
+def vocabulary(rng, size):
+    words = {}
+    while len(words) < size:
+        words[''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))] = None
+    return list(words)
+
+
+def phrases(rng, words, low, high):
+    weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    while True:
+        yield ' '.join(rng.choices(
+            words, cum_weights=weights, k=rng.randint(low, high)
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--authors', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--words', type=int, default=50000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django('ya_note')
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connections
+    from django.db.models import Q
+    from notes.models import Note
+    from notes.search import search_notes
+
+    directory = tempfile.TemporaryDirectory()
+    connections['default'].close()
+    connections['default'].settings_dict['NAME'] = os.path.join(
+        directory.name, 'notes.sqlite3'
+    )
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'author{number}') for number in range(args.authors)
+    )
+    authors = list(User.objects.all())
+    author = authors[0]
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng, args.words)
+    titles = phrases(rng, words, 1, 4)
+    texts = phrases(rng, words, 10, 60)
+    for start in range(0, args.notes, args.batch):
+        Note.objects.bulk_create(
+            Note(
+                title=next(titles),
+                text=next(texts),
+                slug=f'note-{number}',
+                author=authors[number % len(authors)],
+            )
+            for number in range(start, min(start + args.batch, args.notes))
+        )
+
+    def scan(query):
+        return list(Note.objects.filter(
+            Q(title__icontains=query) | Q(text__icontains=query),
+            author=author,
+        ).only('title', 'slug')[:args.limit])
+
+    results = {
+        'notes': args.notes,
+        'authors': args.authors,
+        'limit': args.limit,
+        'queries': {},
+    }
+    for rank in QUERY_RANKS:
+        query = words[rank - 1]
+        fts = best_of(lambda: search_notes(author, query, args.limit), 3)
+        icontains = best_of(lambda: scan(query), 3)
+        results['queries'][f'{rank}:{query}'] = {
+            'fts_ms': round(fts * 1000, 2),
+            'icontains_ms': round(icontains * 1000, 2),
+        }
+    connections['default'].close()
+    directory.cleanup()
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
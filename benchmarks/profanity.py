@@ -0,0 +1,61 @@
+"""Проверка комментария на запрещённые слова: цикл против автомата.
+
+Время старой проверки растёт как длина текста × размер списка,
+скомпилированной — только с длиной текста. Для каждой пары
+(размер списка, длина текста) печатается время на символ.
+"""
+import argparse
+import random
+
+from benchmarks import best_of, report, setup_django
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def naive_search(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, nargs='+', default=[10, 5000])
+    parser.add_argument(
+        '--lengths', type=int, nargs='+', default=[1000, 10000, 100000]
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django('ya_news')
+    from news.moderation import BannedWords
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in args.words:
+        words = [random_word(rng, rng.randint(6, 12)) for _ in range(size)]
+        banned_words = BannedWords(words)
+        for length in args.lengths:
+            # Чистый текст — худший случай: просматривается целиком.
+            text = ' '.join(
+                random_word(rng, 5) for _ in range(length // 6)
+            )[:length]
+            naive = best_of(lambda: naive_search(words, text), repeat=3)
+            compiled = best_of(lambda: banned_words.search(text), repeat=3)
+            results.append({
+                'words': size,
+                'length': length,
+                'naive_ns_per_char': round(naive / length * 1e9, 1),
+                'compiled_ns_per_char': round(compiled / length * 1e9, 1),
+            })
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,519 @@
+"""Все маршруты news.urls и notes.urls под нагрузкой.
+
+Каждый проект запускается в своём процессе: временная база SQLite
+заполняется синтетическими данными (N новостей по M комментариев,
+K пользователей по P заметок), затем каждый маршрут прогоняется
+через тестовый клиент и через настоящий WSGI-сервер (wsgiref
+с пулом потоков). Маршруты, которые меняют данные, получают
+и GET, и POST. Для каждого маршрута печатаются пропускная способность,
+p50/p95/p99 и число SQL-запросов на запрос — по метрикам из
+RequestMetricsMiddleware.
+
+С ``--baseline`` результаты сравниваются с сохранённым ранее JSON
+(``--output``): рост числа запросов или задержки p50 больше чем
+на ``--threshold`` считается регрессией, и скрипт завершается с кодом 1.
+"""
+import argparse
+import http.client
+import importlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from benchmarks import SETTINGS, report, setup_django
+from benchmarks.notes_search import phrases, vocabulary
+
+CSRF_TOKEN = 'a' * 64
+
+# Заметок в одном загружаемом файле notes:import.
+IMPORT_ROWS = 20
+
+BOUNDARY = 'BenchmarkBoundary'
+
+NAMESPACES = {
+    'ya_news': 'news',
+    'ya_note': 'notes',
+}
+
+# Маршрут: имя URL, метод и функции номера запроса -> путь и данные.
+Route = namedtuple('Route', 'name method path data')
+
+
+class PooledWSGIServer(WSGIServer):
+    """Запросы обрабатывает пул потоков, как воркер gunicorn gthread.
+
+    Потоки живут дольше запроса, поэтому соединения с базой
+    переиспользуются (CONN_MAX_AGE), как и в настоящем деплое.
+    """
+
+    def __init__(self, *args, threads=4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = threads
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def connect_threads(self):
+        """Соединения с базой открываются заранее, вне замеров."""
+        from django.db import connections
+
+        barrier = threading.Barrier(self.threads)
+
+        def connect():
+            barrier.wait()
+            connections['default'].ensure_connection()
+
+        for future in [
+            self.pool.submit(connect) for _ in range(self.threads)
+        ]:
+            future.result()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get(name, path):
+    return Route(name, 'GET', path, None)
+
+
+def cycle(values):
+    return lambda number: values[number % len(values)]
+
+
+def create_users(count):
+    """bulk_create в SQLite не возвращает pk, поэтому читаем заново."""
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{number}') for number in range(count)
+    )
+    return list(User.objects.order_by('pk'))
+
+
+def seed_news(args, rng, words):
+    """Новости с комментариями; пользователи пишут по очереди."""
+    from news.models import Comment, News
+
+    users = create_users(args.users)
+    titles, texts = phrases(rng, words, 2, 6), phrases(rng, words, 20, 60)
+    News.objects.bulk_create(
+        News(title=next(titles), text=next(texts))
+        for _ in range(args.news)
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    comments = phrases(rng, words, 3, 20)
+    Comment.objects.bulk_create(
+        Comment(news_id=pk, author=users[number % len(users)],
+                text=next(comments))
+        for pk in news_ids
+        for number in range(args.comments)
+    )
+    News.objects.refresh_comment_count()
+    return users[0], news_ids
+
+
+def news_routes(args, author, news_ids, words, label, count):
+    """Маршруты ya_news; для удаления заранее создаются комментарии."""
+    from django.urls import reverse
+    from news.models import Comment
+
+    edited = Comment.objects.filter(author=author).values_list(
+        'pk', flat=True
+    )[0]
+    doomed = f'Удалить {label}'
+    Comment.objects.bulk_create(
+        Comment(news_id=news_ids[0], author=author, text=doomed)
+        for _ in range(count)
+    )
+    doomed = list(
+        Comment.objects.filter(text=doomed).values_list('pk', flat=True)
+    )
+    detail = cycle([reverse('news:detail', args=[pk]) for pk in news_ids])
+    delete = cycle([reverse('news:delete', args=[pk]) for pk in doomed])
+    edit = reverse('news:edit', args=[edited])
+    return [
+        get('news:home', lambda number: reverse('news:home')),
+        get('news:feed_rss', lambda number: reverse('news:feed_rss')),
+        get('news:feed_atom', lambda number: reverse('news:feed_atom')),
+        get('news:feed_json', lambda number: reverse('news:feed_json')),
+        get('news:search', lambda number: (
+            reverse('news:search') + '?' + urlencode({'q': words[0]})
+        )),
+        get('news:detail', detail),
+        Route('news:detail', 'POST', detail, lambda number: {
+            'text': f'Комментарий {label} {number}',
+        }),
+        get('news:edit', lambda number: edit),
+        Route('news:edit', 'POST', lambda number: edit, lambda number: {
+            'text': f'Исправленный комментарий {number}',
+        }),
+        get('news:delete', delete),
+        Route('news:delete', 'POST', delete, lambda number: {}),
+    ]
+
+
+def seed_notes(args, rng, words):
+    """Заметки пользователей; slug задан, чтобы не подбирать свободный."""
+    from notes.models import Note
+
+    users = create_users(args.users)
+    titles, texts = phrases(rng, words, 2, 6), phrases(rng, words, 20, 60)
+    Note.objects.bulk_create(
+        Note(title=next(titles), text=next(texts), author=user,
+             slug=f'note-{user.pk}-{number}')
+        for user in users
+        for number in range(args.notes)
+    )
+    return users[0], None
+
+
+def notes_routes(args, author, extra, words, label, count):
+    """Маршруты ya_note; для удаления заранее создаются заметки.
+
+    Импорт загружает файл NDJSON из IMPORT_ROWS заметок. Половина
+    заголовков повторяется от запроса к запросу, поэтому измеряется
+    и подбор свободных slug с растущими номерами.
+    """
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.urls import reverse
+    from notes.models import Note
+
+    slugs = list(Note.objects.filter(author=author).values_list(
+        'slug', flat=True
+    ))
+    doomed = [f'delete-{label}-{number}' for number in range(count)]
+    Note.objects.bulk_create(
+        Note(title='Удалить', text='Текст', author=author, slug=slug)
+        for slug in doomed
+    )
+    detail = cycle([reverse('notes:detail', args=[slug]) for slug in slugs])
+    delete = cycle([reverse('notes:delete', args=[slug]) for slug in doomed])
+    edit = reverse('notes:edit', args=[slugs[0]])
+
+    def upload(number):
+        rows = (
+            json.dumps({
+                'title': words[row % 5] if row % 2 else (
+                    f'{words[row % 5]} {words[number % len(words)]}'
+                ),
+                'text': f'Импорт {label} {number}',
+            }, ensure_ascii=False)
+            for row in range(IMPORT_ROWS)
+        )
+        return {
+            'file': SimpleUploadedFile(
+                f'notes-{number}.ndjson', '\n'.join(rows).encode()
+            ),
+            'format': 'ndjson',
+        }
+
+    return [
+        get('notes:home', lambda number: reverse('notes:home')),
+        get('notes:list', lambda number: reverse('notes:list')),
+        get('notes:list_json', lambda number: reverse('notes:list_json')),
+        get('notes:search', lambda number: (
+            reverse('notes:search') + '?' + urlencode({'q': words[0]})
+        )),
+        get('notes:export', lambda number: reverse('notes:export')),
+        get('notes:import', lambda number: reverse('notes:import')),
+        Route(
+            'notes:import', 'POST', lambda number: reverse('notes:import'),
+            upload,
+        ),
+        get('notes:success', lambda number: reverse('notes:success')),
+        get('notes:detail', detail),
+        get('notes:add', lambda number: reverse('notes:add')),
+        Route(
+            'notes:add', 'POST', lambda number: reverse('notes:add'),
+            lambda number: {
+                'title': f'Новая заметка {label} {number}', 'text': 'Текст',
+            },
+        ),
+        get('notes:edit', lambda number: edit),
+        Route('notes:edit', 'POST', lambda number: edit, lambda number: {
+            'title': 'Изменённая заметка', 'text': f'Текст {number}',
+            'slug': slugs[0],
+        }),
+        get('notes:delete', delete),
+        Route('notes:delete', 'POST', delete, lambda number: {}),
+    ]
+
+
+PROJECTS = {
+    'ya_news': (seed_news, news_routes),
+    'ya_note': (seed_notes, notes_routes),
+}
+
+
+def check_coverage(project, routes):
+    """Каждое имя URL приложения должно быть в списке маршрутов."""
+    from django.urls import get_resolver
+
+    namespace = NAMESPACES[project]
+    _, resolver = get_resolver().namespace_dict[namespace]
+    names = {
+        f'{namespace}:{name}'
+        for name in resolver.reverse_dict if isinstance(name, str)
+    }
+    missing = names - {route.name for route in routes}
+    if missing:
+        sys.exit(f'Маршруты без бенчмарка: {", ".join(sorted(missing))}')
+
+
+class ClientDriver:
+    """Запросы через тестовый клиент Django в этом же потоке."""
+    name = 'client'
+
+    def __init__(self, author, threads):
+        from django.test import Client
+        self.client = Client()
+        self.client.force_login(author)
+
+    def __call__(self, method, path, data):
+        if method == 'GET':
+            response = self.client.get(path)
+        else:
+            response = self.client.post(path, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code
+
+
+class ServerDriver:
+    """Запросы по HTTP к WSGI-серверу в этом же процессе."""
+    name = 'server'
+
+    def __init__(self, author, threads):
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.test import Client
+
+        client = Client()
+        client.force_login(author)
+        self.cookie = (
+            f'sessionid={client.cookies["sessionid"].value}; '
+            f'csrftoken={CSRF_TOKEN}'
+        )
+        self.server = PooledWSGIServer(
+            ('127.0.0.1', 0), QuietHandler, threads=threads
+        )
+        self.server.set_app(WSGIHandler())
+        self.server.connect_threads()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __call__(self, method, path, data):
+        from django.test.client import encode_multipart
+
+        connection = http.client.HTTPConnection(
+            '127.0.0.1', self.server.server_port
+        )
+        headers = {'Host': 'localhost', 'Cookie': self.cookie}
+        body = None
+        if method == 'POST':
+            data = dict(data, csrfmiddlewaretoken=CSRF_TOKEN)
+            if any(hasattr(value, 'read') for value in data.values()):
+                body = encode_multipart(BOUNDARY, data)
+                headers['Content-Type'] = (
+                    f'multipart/form-data; boundary={BOUNDARY}'
+                )
+            else:
+                body = urlencode(data)
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        connection.request(method, path, body, headers)
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        return response.status
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(values, fraction):
+    return round(sorted(values)[int(fraction * (len(values) - 1))] * 1000, 2)
+
+
+def measure(registry, driver, route, count, concurrency):
+    """Прогон маршрута: count запросов в concurrency потоков."""
+    registry.reset()
+    latencies, errors = [], []
+
+    def run(offset):
+        for number in range(offset, count, concurrency):
+            start = time.perf_counter()
+            status = driver(
+                route.method, route.path(number),
+                route.data(number) if route.data else None,
+            )
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        run(0)
+    else:
+        threads = [
+            threading.Thread(target=run, args=(offset,))
+            for offset in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    queries = sum(
+        view['queries']['sum'] for view in registry.snapshot().values()
+    )
+    return {
+        'requests': count,
+        'errors': len(errors),
+        'rps': round(count / elapsed, 1),
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'queries': round(queries / count, 2),
+    }
+
+
+def run_project(args):
+    """Заполняет базу и прогоняет маршруты проекта обоими способами."""
+    setup_django(args.project)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS += ['testserver']
+    registry = importlib.import_module(
+        SETTINGS[args.project].replace('settings', 'metrics')
+    ).registry
+    directory = tempfile.TemporaryDirectory()
+    connections['default'].close()
+    connections['default'].settings_dict['NAME'] = os.path.join(
+        directory.name, 'routes.sqlite3'
+    )
+    call_command('migrate', verbosity=0)
+
+    seed, build_routes = PROJECTS[args.project]
+    rng = random.Random(args.seed)
+    words = vocabulary(rng, args.words)
+    author, extra = seed(args, rng, words)
+    results = {
+        'dataset': {
+            name: getattr(args, name)
+            for name in ('news', 'comments', 'users', 'notes', 'seed')
+        },
+    }
+    for driver_class, concurrency in (
+        (ClientDriver, 1), (ServerDriver, args.concurrency)
+    ):
+        driver = driver_class(author, concurrency)
+        routes = build_routes(
+            args, author, extra, words, driver.name, args.requests
+        )
+        check_coverage(args.project, routes)
+        results[driver.name] = {
+            f'{route.name} {route.method}': measure(
+                registry, driver, route, args.requests, concurrency
+            )
+            for route in routes
+        }
+        if hasattr(driver, 'close'):
+            driver.close()
+    connections.close_all()
+    directory.cleanup()
+    return results
+
+
+def regressions(results, baseline, threshold):
+    """Маршруты, ставшие медленнее или сделавшие больше запросов."""
+    found = []
+    for project, drivers in baseline.items():
+        for driver, routes in drivers.items():
+            if driver == 'dataset':
+                continue
+            for route, old in routes.items():
+                new = results.get(project, {}).get(driver, {}).get(route)
+                if new is None:
+                    continue
+                where = f'{project} {driver} {route}'
+                if new['queries'] > old['queries']:
+                    found.append(
+                        f'{where}: запросов {old["queries"]} -> '
+                        f'{new["queries"]}'
+                    )
+                if new['p50_ms'] > old['p50_ms'] * (1 + threshold):
+                    found.append(
+                        f'{where}: p50 {old["p50_ms"]} -> {new["p50_ms"]} ms'
+                    )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--project', choices=PROJECTS)
+    parser.add_argument('--news', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=20)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--notes', type=int, default=50)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Куда сохранить результаты.')
+    parser.add_argument('--baseline', help='JSON прошлого запуска.')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.project:
+        print(json.dumps(run_project(args)))
+        return
+
+    results = {}
+    for project in PROJECTS:
+        process = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.routes', '--project', project]
+            + sys.argv[1:],
+            stdout=subprocess.PIPE, check=True, text=True,
+        )
+        results[project] = json.loads(process.stdout)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+    report(results)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            found = regressions(results, json.load(baseline), args.threshold)
+        if found:
+            sys.exit('Регрессии:\n' + '\n'.join(found))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Транслитерация заголовков: pytils.translit.slugify против кэша.
+
+Корпус имитирует импорт: заголовки собираются из русских слов,
+а их частоты подчиняются закону Ципфа — немногие заголовки
+(«Список покупок», «Встреча») повторяются тысячи раз.
+"""
+import argparse
+import random
+
+from benchmarks import best_of, report, setup_django
+
+WORDS = (
+    'список покупок встреча план отпуск идеи проект заметка задачи отчёт '
+    'звонок врачу книги фильмы рецепт борща тренировка бюджет подарки '
+    'день рождения ремонт квартиры дача поездка в москву конспект лекции '
+    'экзамен по математике собеседование вопросы к команде черновик письма'
+).split()
+
+
+def title_corpus(rng, size, unique):
+    titles = [
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 5)))
+        .capitalize()
+        for _ in range(unique)
+    ]
+    weights = [1 / rank for rank in range(1, unique + 1)]
+    return rng.choices(titles, weights=weights, k=size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=200000)
+    parser.add_argument('--unique', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django('ya_note')
+    from pytils.translit import slugify as raw_slugify
+    from notes.slugs import slugify
+
+    corpus = title_corpus(random.Random(args.seed), args.titles, args.unique)
+
+    def cached_run():
+        slugify.cache_clear()
+        for title in corpus:
+            slugify(title)
+
+    raw = best_of(lambda: [raw_slugify(title) for title in corpus], 3)
+    cached = best_of(cached_run, 3)
+    info = slugify.cache_info()
+    report({
+        'titles': args.titles,
+        'unique': args.unique,
+        'raw_us_per_title': round(raw / args.titles * 1e6, 2),
+        'cached_us_per_title': round(cached / args.titles * 1e6, 2),
+        'speedup': round(raw / cached, 1),
+        'hits': info.hits,
+        'misses': info.misses,
+        'cache_size': info.maxsize,
+    })
+
+
+if __name__ == '__main__':
+    main()
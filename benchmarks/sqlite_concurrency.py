@@ -0,0 +1,201 @@
+"""Конкурентная нагрузка на SQLite: профиль по умолчанию против WAL.
+
+Несколько процессов, как воркеры gunicorn, гоняют через WSGI-обработчик
+ya_news смесь запросов: доля --writes отправляет комментарий, остальные
+читают главную или страницу новости. Каждый профиль получает копию одной
+и той же исходной базы. Замеряются пропускная способность, задержки
+и число ошибок «database is locked».
+"""
+import argparse
+import io
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks import report, setup_django
+
+CSRF_TOKEN = 'a' * 64
+
+DEFAULT_PROFILE = {'PRAGMAS': {}, 'CONN_MAX_AGE': 0}
+
+
+def seed(news_count, users_count):
+    """Исходная база с новостями и сессиями авторов комментариев."""
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test import Client
+    from news.models import News
+
+    call_command('migrate', verbosity=0)
+    News.objects.bulk_create(
+        News(title=f'Новость {number}', text='Текст новости')
+        for number in range(news_count)
+    )
+    sessions = []
+    for number in range(users_count):
+        client = Client()
+        client.force_login(
+            get_user_model().objects.create_user(username=f'user{number}')
+        )
+        sessions.append(client.cookies['sessionid'].value)
+    connections['default'].close()
+    return sessions
+
+
+def call(handler, method, path, cookie, data=None):
+    body = urlencode(data or {}).encode()
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'SERVER_NAME': 'localhost',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': cookie,
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+    response = handler(environ, lambda status, headers: statuses.append(
+        status
+    ))
+    for _ in response:
+        pass
+    response.close()
+    return int(statuses[0].split()[0])
+
+
+def worker(task):
+    """Нагрузка одного процесса: задержки и число ошибок."""
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import OperationalError, connections
+
+    number, session, args = task
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed + number)
+    handler = WSGIHandler()
+    cookie = f'sessionid={session}; csrftoken={CSRF_TOKEN}'
+    latencies = {'read': [], 'write': []}
+    errors = 0
+    deadline = time.perf_counter() + args.duration
+    while time.perf_counter() < deadline:
+        pk = rng.randint(1, args.news)
+        start = time.perf_counter()
+        try:
+            if rng.random() < args.writes:
+                kind = 'write'
+                status = call(handler, 'POST', f'/news/{pk}/', cookie, {
+                    'text': 'Комментарий под нагрузкой',
+                    'csrfmiddlewaretoken': CSRF_TOKEN,
+                })
+            else:
+                kind = 'read'
+                path = rng.choice(('/', f'/news/{pk}/'))
+                status = call(handler, 'GET', path, cookie)
+            if status >= 500:
+                errors += 1
+                continue
+        except OperationalError:
+            errors += 1
+            continue
+        latencies[kind].append(time.perf_counter() - start)
+    connections.close_all()
+    return latencies, errors
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return round(
+        sorted(values)[int(fraction * (len(values) - 1))] * 1000, 2
+    )
+
+
+def run_profile(source, directory, name, profile, sessions, args):
+    from django.core.cache import cache
+    from django.db import connections
+    from news.models import Comment
+
+    path = os.path.join(directory, f'{name}.sqlite3')
+    shutil.copyfile(source, path)
+    database = connections.databases['default']
+    database.update(profile, NAME=path)
+    connections['default'].close()
+    cache.clear()
+    tasks = [
+        (number, sessions[number % len(sessions)], args)
+        for number in range(args.workers)
+    ]
+    with multiprocessing.get_context('fork').Pool(args.workers) as pool:
+        results = pool.map(worker, tasks)
+    reads = [value for result, _ in results for value in result['read']]
+    writes = [value for result, _ in results for value in result['write']]
+    errors = sum(errors for _, errors in results)
+    comments = Comment.objects.count()
+    connections['default'].close()
+    return {
+        'requests_per_s': round((len(reads) + len(writes)) / args.duration),
+        'reads': len(reads),
+        'writes': len(writes),
+        'comments': comments,
+        'errors': errors,
+        'read_p50_ms': percentile(reads, 0.5),
+        'read_p99_ms': percentile(reads, 0.99),
+        'write_p50_ms': percentile(writes, 0.5),
+        'write_p99_ms': percentile(writes, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--writes', type=float, default=0.2)
+    parser.add_argument('--news', type=int, default=100)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django('ya_news')
+    from django.conf import settings
+    from django.db import connections
+
+    settings.DEBUG = False
+    settings.REQUEST_BUDGETS = {}
+    database = connections.databases['default']
+    profiles = {
+        'default': DEFAULT_PROFILE,
+        'production': {
+            'PRAGMAS': database['PRAGMAS'],
+            'CONN_MAX_AGE': database['CONN_MAX_AGE'],
+        },
+    }
+    directory = tempfile.TemporaryDirectory()
+    source = os.path.join(directory.name, 'source.sqlite3')
+    database.update(DEFAULT_PROFILE, NAME=source)
+    sessions = seed(args.news, args.users)
+
+    results = {
+        'workers': args.workers,
+        'duration_s': args.duration,
+        'writes': args.writes,
+        'profiles': {
+            name: run_profile(
+                source, directory.name, name, profile, sessions, args
+            )
+            for name, profile in profiles.items()
+        },
+    }
+    directory.cleanup()
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Параллельный запуск тестов ya_news и ya_note.
+
+Сначала для каждого проекта готовится снимок базы с миграциями
+(см. yanews/testing.py), затем тесты обоих проектов одновременно идут
+в нескольких процессах: каждый берёт свою часть (``--shard``).
+В конце печатается время каждой части и общее время, а с ``--baseline``
+ещё и ускорение относительно последовательного запуска, как
+в run_tests.sh.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+PROJECTS = {
+    'ya_news': 'yanews',
+    'ya_note': 'yanote',
+}
+
+# pytest завершается с кодом 5, если в части не оказалось тестов.
+NO_TESTS_COLLECTED = 5
+
+
+def build_snapshots():
+    """Снимки баз обоих проектов строятся заранее и параллельно.
+
+    Иначе части одного проекта стали бы строить снимок одновременно.
+    """
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable, '-c',
+                'import django; django.setup(); '
+                f'from {package}.testing import ensure_snapshot; '
+                'ensure_snapshot()',
+            ],
+            cwd=BASE_DIR / project,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE=f'{package}.settings'),
+        )
+        for project, package in PROJECTS.items()
+    ]
+    for process in processes:
+        if process.wait():
+            sys.exit(process.returncode)
+
+
+def run_shard(project, index, shards):
+    """Одна часть тестов проекта: имя, код возврата, вывод и время."""
+    start = time.perf_counter()
+    process = subprocess.run(
+        [
+            sys.executable, '-m', 'pytest', '-q', '--tb=short',
+            '-p', 'no:cacheprovider', f'--shard={index}/{shards}',
+        ],
+        cwd=BASE_DIR / project,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    return (
+        f'{project} {index + 1}/{shards}',
+        process.returncode,
+        process.stdout,
+        time.perf_counter() - start,
+    )
+
+
+def run_baseline():
+    """Время последовательного запуска без шаблонов и частей."""
+    start = time.perf_counter()
+    for project in PROJECTS:
+        subprocess.run(
+            [sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider'],
+            cwd=BASE_DIR / project,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-n', '--shards', type=int, default=max(1, os.cpu_count() // 2),
+        help='Число процессов на проект.',
+    )
+    parser.add_argument(
+        '--baseline', action='store_true',
+        help='Сначала замерить последовательный запуск.',
+    )
+    args = parser.parse_args()
+
+    baseline = run_baseline() if args.baseline else None
+    start = time.perf_counter()
+    build_snapshots()
+    jobs = [
+        (project, index, args.shards)
+        for project in PROJECTS
+        for index in range(args.shards)
+    ]
+    with ThreadPoolExecutor(len(jobs)) as executor:
+        results = list(executor.map(lambda job: run_shard(*job), jobs))
+    durations, failed = 0, []
+    for name, returncode, output, duration in results:
+        durations += duration
+        summary = output.strip().splitlines()[-1:] or ['']
+        print(f'{name}: {summary[0]} ({duration:.1f} s)')
+        if returncode not in (0, NO_TESTS_COLLECTED):
+            failed.append(name)
+            print(output, file=sys.stderr)
+    wall_time = time.perf_counter() - start
+
+    print(f'Время: {wall_time:.1f} s, сумма по частям: {durations:.1f} s, '
+          f'параллельность: {durations / wall_time:.1f}')
+    if baseline is not None:
+        print(f'Последовательно: {baseline:.1f} s, '
+              f'ускорение: {baseline / wall_time:.1f}x')
+    if failed:
+        print('Упали части: ' + ', '.join(failed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
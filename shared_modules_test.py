@@ -0,0 +1,34 @@
+"""Общие модули yanews и yanote должны совпадать.
+
+Модули ниже скопированы между проектами и отличаются только именем
+пакета. Правка одной копии без другой здесь и ловится: после замены
+yanote на yanews файлы сравниваются побайтно.
+"""
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+SHARED_MODULES = (
+    'asgi.py',
+    'asyncviews.py',
+    'metrics.py',
+    'routers.py',
+    'sqlite.py',
+    'testing.py',
+    'wsgi.py',
+)
+
+message_template = (
+    '\nМодуль `{module}` в ya_news/yanews и ya_note/yanote разошёлся. '
+    'Перенесите правку в обе копии.'
+)
+
+errors = []
+for module in SHARED_MODULES:
+    news = (BASE_DIR / 'ya_news/yanews' / module).read_text(encoding='utf-8')
+    note = (BASE_DIR / 'ya_note/yanote' / module).read_text(encoding='utf-8')
+    if note.replace('yanote', 'yanews') != news:
+        errors.append(message_template.format(module=module))
+
+
+assert not errors, ''.join(errors)
@@ -0,0 +1,3 @@
+from yanews.testing import (  # noqa: F401
+    django_db_setup, pytest_addoption, pytest_collection_modifyitems
+)
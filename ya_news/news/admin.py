@@ -1,6 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import Comment, News
+from .forms import banned_words
+from .models import BannedWord, Comment, News
+from .moderation import bulk_delete, bulk_hide
 
 
 class CommentInline(admin.StackedInline):
@@ -13,3 +15,87 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    readonly_fields = ('comment_count',)
+
+    def save_related(self, request, form, formsets, change):
+        """Инлайн мог добавить или удалить комментарии."""
+        super().save_related(request, form, formsets, change)
+        News.objects.filter(pk=form.instance.pk).refresh_comment_count()
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'news', 'author', 'created', 'is_hidden')
+    list_filter = ('is_hidden', 'created')
+    list_select_related = ('news', 'author')
+    search_fields = ('author__username',)
+    raw_id_fields = ('news', 'author')
+    actions = (
+        'hide_comments',
+        'show_comments',
+        'hide_banned_comments',
+        'delete_comments',
+    )
+
+    def get_actions(self, request):
+        """Вместо стандартного удаления — delete_comments с отчётом."""
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def save_model(self, request, obj, form, change):
+        """Пересчитывает счётчики новостей после правки в форме.
+
+        Правка могла скрыть комментарий или перенести его в другую новость.
+        """
+        super().save_model(request, obj, form, change)
+        News.objects.filter(
+            pk__in={obj.news_id, form.initial.get('news')} - {None}
+        ).refresh_comment_count()
+
+    def delete_model(self, request, obj):
+        bulk_delete(Comment.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        bulk_delete(queryset)
+
+    def report(self, request, verb, count):
+        self.message_user(
+            request, f'{verb} комментариев: {count}', messages.SUCCESS
+        )
+
+    @admin.action(
+        description='Скрыть выбранные комментарии',
+        permissions=('change',),
+    )
+    def hide_comments(self, request, queryset):
+        self.report(request, 'Скрыто', bulk_hide(queryset))
+
+    @admin.action(
+        description='Показать выбранные комментарии',
+        permissions=('change',),
+    )
+    def show_comments(self, request, queryset):
+        self.report(request, 'Показано', bulk_hide(queryset, hidden=False))
+
+    @admin.action(
+        description='Скрыть выбранные с запрещёнными словами',
+        permissions=('change',),
+    )
+    def hide_banned_comments(self, request, queryset):
+        self.report(request, 'Скрыто', bulk_hide(
+            queryset, banned_words=banned_words.get()
+        ))
+
+    @admin.action(
+        description='Удалить выбранные комментарии',
+        permissions=('delete',),
+    )
+    def delete_comments(self, request, queryset):
+        self.report(request, 'Удалено', bulk_delete(queryset))
+
+
+@admin.register(BannedWord)
+class BannedWordAdmin(admin.ModelAdmin):
+    list_display = ('word',)
+    search_fields = ('word',)
@@ -0,0 +1,14 @@
+"""URL новостей с асинхронными страницами чтения."""
+from django.urls import path
+
+from news import async_views, urls
+
+app_name = urls.app_name
+
+urlpatterns = [
+    path('', async_views.NewsList.as_view(), name='home'),
+    path('news/<int:pk>/', async_views.NewsDetail.as_view(), name='detail'),
+] + [
+    pattern for pattern in urls.urlpatterns
+    if pattern.name not in ('home', 'detail')
+]
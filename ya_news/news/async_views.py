@@ -0,0 +1,22 @@
+"""Асинхронные страницы чтения новостей для ASGI.
+
+Подключаются через news.async_urls. Логика и шаблоны те же, что
+в views.py: проба версии и ETag, кэш главной и треда выполняются
+в пуле потоков, а цикл событий тем временем обслуживает другие
+запросы. Отправка комментария пишет в базу и остаётся
+thread_sensitive.
+"""
+from yanews.asyncviews import AsyncView, in_thread
+
+from . import views
+
+
+class NewsList(AsyncView, views.NewsList):
+    """Список новостей."""
+    get = in_thread(views.NewsList.get)
+
+
+class NewsDetail(AsyncView, views.NewsDetail):
+    """Новость с комментариями; комментарий отправляется как раньше."""
+    get = in_thread(views.NewsDetail.get)
+    post = in_thread(views.NewsDetailView.post, thread_sensitive=True)
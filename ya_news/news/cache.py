@@ -0,0 +1,133 @@
+"""Кэш страниц новостей с версиями.
+
+Вместо удаления записей при изменениях сигналы увеличивают номер
+версии, входящий в ключ: старые записи просто перестают читаться
+и вытесняются по таймауту. Бэкенд выбирается настройкой
+NEWS_CACHE_ALIAS среди CACHES.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+HOME_VERSION_KEY = 'news:home:version'
+
+
+def get_cache():
+    return caches[settings.NEWS_CACHE_ALIAS]
+
+
+def get_version(key):
+    """Текущая версия; при отсутствии ключа начинаем с текущего времени.
+
+    Так после вытеснения или очистки кэша номера версий не повторяются
+    и не совпадают со старыми записями.
+    """
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def bump_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def home_page_key():
+    return 'news:home:{count}:{version}'.format(
+        count=settings.NEWS_COUNT_ON_HOME_PAGE,
+        version=get_version(HOME_VERSION_KEY),
+    )
+
+
+def cached_page(key, render):
+    """Возвращает страницу из кэша или рендерит её через render().
+
+    Защита от «стада»: при промахе рендерит только процесс, взявший
+    блокировку. Остальные отдают последнюю отрендеренную версию,
+    а если её нет — ждут результата не дольше NEWS_CACHE_LOCK_TIMEOUT.
+    """
+    cache = get_cache()
+    content = cache.get(key)
+    if content is not None:
+        return content
+    stale_key = key.rsplit(':', 1)[0] + ':stale'
+    lock_key = key + ':lock'
+    timeout = settings.NEWS_CACHE_LOCK_TIMEOUT
+    locked = cache.add(lock_key, True, timeout)
+    if not locked:
+        content = cache.get(stale_key)
+        deadline = time.monotonic() + timeout
+        while content is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            content = cache.get(key)
+        if content is not None:
+            return content
+    try:
+        content = render()
+        cache.set_many(
+            {key: content, stale_key: content}, settings.NEWS_CACHE_TIMEOUT
+        )
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return content
+
+
+def cached_comment_page(news, after, before, build):
+    """Страница треда, отрендеренная один раз для версии треда.
+
+    Версия — News.thread_updated_at: её сдвигает любая запись
+    в комментарии новости, и видят её все процессы.
+    """
+    key = 'news:{pk}:thread:{version}:{per_page}:{after}:{before}'.format(
+        pk=news.pk,
+        version=news.thread_updated_at.timestamp(),
+        per_page=settings.COMMENTS_PER_PAGE,
+        after=after or '',
+        before=before or '',
+    )
+    cache = get_cache()
+    page = cache.get(key)
+    if page is None:
+        page = build()
+        cache.set(key, page, settings.NEWS_CACHE_TIMEOUT)
+    return page
+
+
+def conditional_response(request, etag, last_modified, respond):
+    """Ответ 304 по валидаторам или respond() с ними в заголовках.
+
+    То же, что декоратор condition, но валидаторы считает вызывающий:
+    объект, по которому они считаются, он может использовать и дальше.
+    """
+    etag = quote_etag(etag)
+    last_modified = last_modified and int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = respond()
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def feed_key(request, kind, version):
+    """Ключ тела ленты: ссылки в нём абсолютные, от схемы и хоста."""
+    return 'news:feed:{kind}:{scheme}:{host}:{size}:{version}'.format(
+        kind=kind,
+        scheme=request.scheme,
+        host=request.get_host(),
+        size=settings.NEWS_FEED_SIZE,
+        version=version,
+    )
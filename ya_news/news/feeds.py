@@ -0,0 +1,113 @@
+"""Ленты последних новостей: RSS, Atom и JSON Feed.
+
+Агрегаторы опрашивают ленту часто, поэтому ответ почти ничего
+не стоит. Валидаторы читаются одним запросом по первичному ключу
+из строки FeedVersion в БД, общей для всех процессов: её сдвигают
+запись и удаление новостей. Условный запрос без изменений получает
+304 после этого запроса, а тело ленты рендерится один раз на версию
+и хост: ссылки в нём абсолютные.
+"""
+import json
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+
+from .cache import cached_page, conditional_response, feed_key
+from .models import FeedVersion, News
+
+TITLE = 'YaNews'
+DESCRIPTION = 'Последние новости'
+
+
+def latest_news():
+    return News.objects.all()[:settings.NEWS_FEED_SIZE]
+
+
+def published(news):
+    return timezone.make_aware(datetime.combine(news.date, time.min))
+
+
+class LatestNewsRss(Feed):
+    title = TITLE
+    description = DESCRIPTION
+
+    def link(self):
+        return reverse('news:home')
+
+    def items(self):
+        return latest_news()
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('news:detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return published(item)
+
+
+class LatestNewsAtom(LatestNewsRss):
+    feed_type = Atom1Feed
+    subtitle = DESCRIPTION
+
+
+def latest_news_json(request):
+    """Лента в формате JSON Feed 1.1."""
+    home = request.build_absolute_uri(reverse('news:home'))
+    return HttpResponse(json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': TITLE,
+        'description': DESCRIPTION,
+        'home_page_url': home,
+        'feed_url': request.build_absolute_uri(),
+        'items': [
+            {
+                'id': str(news.pk),
+                'url': request.build_absolute_uri(
+                    reverse('news:detail', args=[news.pk])
+                ),
+                'title': news.title,
+                'content_text': news.text,
+                'date_published': published(news).isoformat(),
+            }
+            for news in latest_news()
+        ],
+    }, ensure_ascii=False))
+
+
+FEEDS = {
+    'rss': (LatestNewsRss(), 'application/rss+xml; charset=utf-8'),
+    'atom': (LatestNewsAtom(), 'application/atom+xml; charset=utf-8'),
+    'json': (latest_news_json, 'application/feed+json; charset=utf-8'),
+}
+
+
+def feed_validators():
+    """ETag-версия лент и время последнего изменения новостей."""
+    updated_at = FeedVersion.current()
+    return updated_at and updated_at.timestamp(), updated_at
+
+
+def news_feed(request, kind):
+    """Лента с условным GET; валидаторы — один запрос на ответ."""
+    feed, content_type = FEEDS[kind]
+    version, updated_at = feed_validators()
+    return conditional_response(
+        request, f'{kind}-{version}', updated_at,
+        lambda: HttpResponse(
+            cached_page(
+                feed_key(request, kind, version),
+                lambda: feed(request).content,
+            ),
+            content_type=content_type,
+        ),
+    )
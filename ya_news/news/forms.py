@@ -1,7 +1,9 @@
+from django import forms
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import BannedWordsIndex
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +12,8 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+banned_words = BannedWordsIndex(BAD_WORDS)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +24,13 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if banned_words.search(text):
+            raise ValidationError(WARNING)
         return text
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Запрос', max_length=200, required=False)
+    date_from = forms.DateField(label='С даты', required=False)
+    date_to = forms.DateField(label='По дату', required=False)
+    page = forms.IntegerField(min_value=1, required=False)
@@ -0,0 +1,76 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from news.forms import banned_words
+from news.models import Comment
+from news.moderation import bulk_delete, bulk_hide
+from yanews.routers import pin_to_primary
+
+
+def date_argument(value):
+    date = parse_date(value)
+    if date is None:
+        raise ValueError(value)
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        'Массово скрывает, показывает или удаляет комментарии по автору, '
+        'новости, датам или запрещённым словам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('hide', 'show', 'delete'))
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--news', type=int, help='Идентификатор новости.')
+        parser.add_argument(
+            '--since', type=date_argument, help='С даты, ГГГГ-ММ-ДД.'
+        )
+        parser.add_argument(
+            '--until', type=date_argument, help='По дату включительно.'
+        )
+        parser.add_argument(
+            '--banned', action='store_true',
+            help='Только комментарии с запрещёнными словами.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    @pin_to_primary()
+    def handle(self, *args, **options):
+        filters = {}
+        if options['author']:
+            filters['author__username'] = options['author']
+        if options['news']:
+            filters['news_id'] = options['news']
+        if options['since']:
+            filters['created__gte'] = timezone.make_aware(
+                datetime.combine(options['since'], time.min)
+            )
+        if options['until']:
+            filters['created__lte'] = timezone.make_aware(
+                datetime.combine(options['until'], time.max)
+            )
+        if not filters and not options['banned']:
+            raise CommandError(
+                'Укажите хотя бы один фильтр: --author, --news, --since, '
+                '--until или --banned.'
+            )
+        queryset = Comment.objects.filter(**filters)
+        kwargs = {
+            'chunk_size': options['chunk_size'],
+            'banned_words': banned_words.get() if options['banned'] else None,
+            'progress': lambda done: self.stdout.write(
+                f'Обработано комментариев: {done}'
+            ),
+        }
+        if options['action'] == 'delete':
+            count = bulk_delete(queryset, **kwargs)
+        else:
+            count = bulk_hide(
+                queryset, hidden=options['action'] == 'hide', **kwargs
+            )
+        self.stdout.write(self.style.SUCCESS(f'Готово: {count}'))
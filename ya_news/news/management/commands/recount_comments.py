@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+from yanews.routers import pin_to_primary
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает News.comment_count по таблице комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'news_ids', nargs='*', type=int,
+            help='Идентификаторы новостей; по умолчанию — все новости.'
+        )
+
+    @pin_to_primary()
+    def handle(self, *args, **options):
+        news = News.objects.all()
+        if options['news_ids']:
+            news = news.filter(pk__in=options['news_ids'])
+        updated = news.refresh_comment_count()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано новостей: {updated}')
+        )
@@ -0,0 +1,206 @@
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from news.cache import HOME_VERSION_KEY, bump_version
+from news.models import Comment, FeedVersion, News
+from yanews.routers import pin_to_primary
+
+User = get_user_model()
+
+WORDS = (
+    'новость город правительство выборы погода футбол хоккей цены рынок '
+    'школа больница дорога мост река область район жители мэр депутат '
+    'закон бюджет налог пенсия зарплата транспорт метро трамвай аэропорт '
+    'вокзал театр музей выставка фестиваль концерт премьера учёный '
+    'открытие исследование спутник ракета экономика банк рубль курс нефть '
+    'урожай зерно ёлка праздник юбилей съезд объявление подъезд щенок '
+    'чемпионат сборная тренер матч победа поражение счёт турнир зима '
+    'весна лето осень снегопад жара ливень ураган пожар авария ремонт '
+    'строительство улица площадь парк набережная эксперимент'
+).split()
+
+POOL_SIZE = 10000
+
+
+def phrase(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def title(rng, max_length):
+    text = phrase(rng, 2, 6).capitalize()
+    if len(text) > max_length:
+        text = text[:max_length].rsplit(' ', 1)[0]
+    return text
+
+
+def zipf_weights(size, skew):
+    return [1 / rank ** skew for rank in range(1, size + 1)]
+
+
+def comment_counts(rng, news_count, total, skew):
+    """Число комментариев у каждой новости: несколько горячих и хвост.
+
+    Доли распределены по закону Ципфа, горячие новости выбираются
+    случайно, а сумма точно равна total.
+    """
+    weights = zipf_weights(news_count, skew)
+    rng.shuffle(weights)
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.sample(range(news_count), total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями '
+        'и комментариями. При одном --seed данные одинаковы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Показатель Ципфа для комментариев по новостям и авторам.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=1000,
+            help='За сколько последних дней распределить новости.',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='seed', help='Начало имён пользователей.'
+        )
+        parser.add_argument(
+            '--password', default='password',
+            help='Общий пароль: хэшируется один раз для всех.',
+        )
+
+    @pin_to_primary()
+    def handle(self, *args, **options):
+        if User.objects.filter(
+            username__regex=rf'^{re.escape(options["prefix"])}\d+$'
+        ).exists():
+            raise CommandError(
+                f'Пользователи {options["prefix"]}N уже есть, '
+                'укажите другой --prefix.'
+            )
+        if options['users'] < 1 or options['news'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь и новость.')
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.started = time.perf_counter()
+
+        password = make_password(options['password'])
+        users = self.seed_users(
+            options['prefix'], options['users'], password
+        )
+        counts = comment_counts(
+            rng, options['news'], options['comments'], options['skew']
+        )
+        news = self.seed_news(rng, counts, options['days'])
+        self.seed_comments(rng, news, users, options['skew'])
+        # bulk_create не отправляет сигналы.
+        FeedVersion.touch()
+        bump_version(HOME_VERSION_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - self.started:.0f} с.'
+        ))
+
+    def progress(self, label, done, total):
+        self.stdout.write(
+            f'{label}: {done}/{total} '
+            f'({time.perf_counter() - self.started:.0f} с)'
+        )
+
+    def insert(self, model, objects):
+        with transaction.atomic():
+            model.objects.bulk_create(objects)
+
+    def new_ids(self, model, start, count):
+        """bulk_create в SQLite не возвращает pk: читаем их заново."""
+        return list(
+            model.objects.filter(pk__gt=start).order_by('pk').values_list(
+                'pk', flat=True
+            )[:count]
+        )
+
+    def seed_users(self, prefix, count, password):
+        start = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        for offset in range(0, count, self.batch_size):
+            self.insert(User, [
+                User(username=f'{prefix}{number}', password=password)
+                for number in range(
+                    offset, min(offset + self.batch_size, count)
+                )
+            ])
+        self.progress('Пользователи', count, count)
+        return self.new_ids(User, start, count)
+
+    def seed_news(self, rng, counts, days):
+        """Новости за последние days дней; счётчик сразу верный."""
+        max_length = News._meta.get_field('title').max_length
+        today = date.today()
+        start = News.objects.aggregate(last=Max('pk'))['last'] or 0
+        dates = []
+        batch = []
+        for count in counts:
+            dates.append(today - timedelta(days=rng.randint(0, days)))
+            batch.append(News(
+                title=title(rng, max_length),
+                text=phrase(rng, 30, 120),
+                date=dates[-1],
+                comment_count=count,
+            ))
+            if len(batch) == self.batch_size:
+                self.insert(News, batch)
+                batch = []
+        self.insert(News, batch)
+        self.progress('Новости', len(counts), len(counts))
+        return list(zip(self.new_ids(News, start, len(counts)), counts, dates))
+
+    def seed_comments(self, rng, news, users, skew):
+        """Комментарии идут после новости; пишут чаще одни и те же люди."""
+        pool = [phrase(rng, 3, 25) for _ in range(POOL_SIZE)]
+        authors = list(accumulate(zipf_weights(len(users), skew)))
+        total = sum(count for _, count, _ in news)
+        now = timezone.now()
+        batch, done = [], 0
+        for news_id, count, news_date in news:
+            first = timezone.make_aware(
+                datetime.combine(news_date, datetime.min.time())
+            )
+            step = (now - first) / (count + 1)
+            for author_id, number in zip(
+                rng.choices(users, cum_weights=authors, k=count),
+                range(1, count + 1),
+            ):
+                batch.append(Comment(
+                    news_id=news_id,
+                    author_id=author_id,
+                    text=rng.choice(pool),
+                    created=first + step * number,
+                ))
+                if len(batch) == self.batch_size:
+                    self.insert(Comment, batch)
+                    done += len(batch)
+                    batch = []
+                    if self.verbosity > 1:
+                        self.progress('Комментарии', done, total)
+        self.insert(Comment, batch)
+        self.progress('Комментарии', total, total)
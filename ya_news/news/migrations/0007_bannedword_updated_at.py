@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bannedword',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+    ]
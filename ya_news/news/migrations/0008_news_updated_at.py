@@ -0,0 +1,36 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:46
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module('news.migrations.0006_search_index')
+
+NEWS_TRIGGERS = search_index.CREATE_INDEX[1:4]
+DROP_NEWS_TRIGGERS = search_index.DROP_INDEX[:3]
+
+
+def recreate_triggers(apps, schema_editor):
+    """SQLite пересоздаёт news_news при AddField, триггеры FTS теряются."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_NEWS_TRIGGERS + NEWS_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_bannedword_updated_at'),
+    ]
+
+    operations = [
+        # При откате RemoveField тоже пересоздаёт таблицу.
+        migrations.RunPython(migrations.RunPython.noop, recreate_triggers),
+        migrations.AddField(
+            model_name='news',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменена'),
+        ),
+        migrations.RunPython(recreate_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:48
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.utils.timezone
+
+news_updated_at = import_module('news.migrations.0008_news_updated_at')
+
+recreate_triggers = news_updated_at.recreate_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_news_updated_at'),
+    ]
+
+    operations = [
+        # При откате RemoveField тоже пересоздаёт таблицу.
+        migrations.RunPython(migrations.RunPython.noop, recreate_triggers),
+        migrations.AddField(
+            model_name='news',
+            name='thread_updated_at',
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False,
+                verbose_name='Изменены комментарии',
+            ),
+        ),
+        migrations.RunPython(recreate_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:53
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.utils.timezone
+
+search_index = import_module('news.migrations.0006_search_index')
+
+COMMENT_TRIGGERS = search_index.CREATE_INDEX[5:8]
+DROP_COMMENT_TRIGGERS = search_index.DROP_INDEX[3:6]
+
+
+def recreate_triggers(apps, schema_editor):
+    """SQLite пересоздаёт news_comment при AlterField, триггеры теряются."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_COMMENT_TRIGGERS + COMMENT_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_news_thread_updated_at'),
+    ]
+
+    operations = [
+        # При откате AlterField тоже пересоздаёт таблицу.
+        migrations.RunPython(migrations.RunPython.noop, recreate_triggers),
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+        migrations.RunPython(recreate_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:14
+
+from django.db import migrations, models
+import django.utils.timezone
+from django.db.models import Max
+from django.utils import timezone
+
+
+def create_feed_version(apps, schema_editor):
+    """Строка версии лент со временем последней правки новостей."""
+    News = apps.get_model('news', 'News')
+    FeedVersion = apps.get_model('news', 'FeedVersion')
+    db = schema_editor.connection.alias
+    updated_at = News.objects.using(db).aggregate(
+        last=Max('updated_at')
+    )['last']
+    FeedVersion.objects.using(db).create(
+        pk=1, updated_at=updated_at or timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_comment_created_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменены новости')),
+            ],
+            options={
+                'verbose_name': 'Версия лент',
+                'verbose_name_plural': 'Версии лент',
+            },
+        ),
+        migrations.RunPython(create_feed_version, migrations.RunPython.noop),
+    ]
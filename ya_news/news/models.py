@@ -1,22 +1,109 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def refresh_comment_count(self):
+        """Пересчитывает счётчик видимых комментариев одним UPDATE."""
+        counts = Comment.objects.filter(
+            news=models.OuterRef('pk'), is_hidden=False
+        ).order_by().values('news').annotate(
+            total=models.Count('pk')
+        ).values('total')
+        return self.update(comment_count=Coalesce(
+            models.Subquery(counts), 0
+        ))
+
+    def delete(self):
+        """Комментарии удаляются заранее одним DELETE, см. News.delete."""
+        with transaction.atomic(using=self.db):
+            delete_comments(Comment.objects.using(self.db).filter(
+                news__in=self.values('pk')
+            ))
+            return super().delete()
+
+
+def delete_comments(queryset):
+    """Удаляет комментарии одним DELETE, без сборщика и сигналов.
+
+    У Comment есть получатели post_delete, поэтому delete() загрузил бы
+    каждую строку и на каждую сдвинул бы версию треда своим UPDATE.
+    Индекс поиска обновляют триггеры, счётчики и версии сдвигает
+    вызывающий код.
+    """
+    return queryset._raw_delete(queryset.db)
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0, editable=False
+    )
+    # Валидаторы лент берутся отсюда, а не из кэша процесса.
+    updated_at = models.DateTimeField('Изменена', auto_now=True)
+    # Сдвигается при любой записи в комментарии: версия треда.
+    thread_updated_at = models.DateTimeField(
+        'Изменены комментарии', default=timezone.now, editable=False
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date',), name='news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def delete(self, using=None, keep_parents=False):
+        """Удаляет новость вместе с тредом без сигналов на комментарий."""
+        using = using or router.db_for_write(News, instance=self)
+        with transaction.atomic(using=using):
+            delete_comments(Comment.objects.using(using).filter(news=self))
+            return super().delete(using, keep_parents)
+
+
+class FeedVersion(models.Model):
+    """Единственная строка: последнее изменение новостей для лент.
+
+    Валидаторы лент читаются по первичному ключу, а не агрегатом по всем
+    новостям. Сдвигают её сигналы записи и удаления News и команды,
+    которые пишут новости в обход сигналов.
+    """
+    PK = 1
+
+    updated_at = models.DateTimeField('Изменены новости', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Версия лент'
+        verbose_name_plural = 'Версии лент'
+
+    @classmethod
+    def current(cls):
+        """Время последнего изменения или None, если строки ещё нет."""
+        return cls.objects.filter(pk=cls.PK).values_list(
+            'updated_at', flat=True
+        ).first()
+
+    @classmethod
+    def touch(cls, using=None):
+        using = using or router.db_for_write(cls)
+        now = timezone.now()
+        versions = cls.objects.using(using)
+        if not versions.filter(pk=cls.PK).update(updated_at=now):
+            versions.get_or_create(pk=cls.PK, defaults={'updated_at': now})
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -28,10 +115,35 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    # Не auto_now_add: seed_news задаёт время комментариев явно.
+    created = models.DateTimeField(default=timezone.now, editable=False)
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+
+    # Запись сама сдвинула News.thread_updated_at своим UPDATE счётчика,
+    # сигнал invalidate_comment_thread второй UPDATE не делает.
+    thread_stamped = False
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class BannedWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+    # Вместе с числом слов — версия списка для всех процессов.
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name = 'Запрещённое слово'
+        verbose_name_plural = 'Запрещённые слова'
+
+    def __str__(self):
+        return self.word
@@ -0,0 +1,246 @@
+"""Поиск запрещённых слов в тексте комментариев.
+
+Список слов один раз компилируется в регулярное выражение по
+префиксному дереву. На каждой позиции текста проверяется не больше
+символов, чем в самом длинном слове, и не больше ветвей, чем букв
+в алфавите, поэтому проверка линейна по длине текста и не зависит
+от размера списка.
+
+Слова берутся из кода, файла BAD_WORDS_FILE и таблицы BannedWord.
+Процесс держит одну скомпилированную копию и перестраивает её, только
+когда изменилась версия списка: число слов и последнее время изменения
+в таблице (видно всем процессам, в отличие от локального кэша) и время
+изменения файла. Версию проверяет не чаще раза
+в BANNED_WORDS_CHECK_INTERVAL секунд. Пропавший файл не роняет
+проверку комментариев: пишется предупреждение, слова из файла
+не применяются.
+
+Массовая модерация (bulk_hide, bulk_delete) работает пачками
+по несколько сотен строк, каждая пачка — в своей транзакции записи.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import router
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import HOME_VERSION_KEY, bump_version
+from .models import BannedWord, Comment, News, delete_comments
+from .transactions import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Латинские буквы и цифры, которыми маскируют похожие русские буквы.
+LOOKALIKES = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к',
+    'm': 'м', 'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у',
+    '0': 'о', '3': 'з', '6': 'б', '@': 'а', 'ё': 'е',
+})
+
+
+def normalize(text):
+    """Приводит регистр и заменяет похожие символы русскими буквами."""
+    return text.casefold().translate(LOOKALIKES)
+
+
+def load_words(path):
+    """Слова из файла: по одному в строке, # — комментарий."""
+    with open(path, encoding='utf-8') as file:
+        lines = (line.split('#', 1)[0].strip() for line in file)
+        return tuple(line for line in lines if line)
+
+
+def build_pattern(words):
+    """Регулярное выражение по префиксному дереву слов."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    # Ищем подстроки, поэтому слово, на котором кончается ветка,
+    # уже даёт совпадение, и более длинные продолжения не нужны.
+    if '' in node:
+        return ''
+    branches = [
+        re.escape(char) + _node_pattern(child)
+        for char, child in sorted(node.items())
+    ]
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+class BannedWords:
+    """Скомпилированный список запрещённых слов."""
+
+    def __init__(self, words):
+        self.words = frozenset(
+            normalize(word.strip()) for word in words if word.strip()
+        )
+        self.pattern = (
+            re.compile(build_pattern(self.words)) if self.words else None
+        )
+
+    def search(self, text):
+        """Первое найденное запрещённое слово или None."""
+        if self.pattern is None:
+            return None
+        match = self.pattern.search(normalize(text))
+        return match.group() if match else None
+
+
+class BannedWordsIndex:
+    """Общий для потоков процесса список с ленивой перезагрузкой."""
+
+    def __init__(self, builtin_words=()):
+        self.builtin_words = tuple(builtin_words)
+        self._lock = threading.Lock()
+        self._words = None
+        self._version = None
+        self._checked_at = None
+
+    def version(self):
+        version = BannedWord.objects.aggregate(
+            count=Count('pk'), updated_at=Max('updated_at')
+        )
+        if settings.BAD_WORDS_FILE:
+            try:
+                modified = os.stat(settings.BAD_WORDS_FILE).st_mtime_ns
+            except OSError:
+                modified = None
+            return version, modified
+        return version
+
+    def load(self):
+        words = self.builtin_words
+        if settings.BAD_WORDS_FILE:
+            try:
+                words += load_words(settings.BAD_WORDS_FILE)
+            except OSError as error:
+                logger.warning('Список BAD_WORDS_FILE не прочитан: %s', error)
+        return words + tuple(
+            BannedWord.objects.values_list('word', flat=True)
+        )
+
+    def get(self):
+        """Актуальный скомпилированный список."""
+        now = time.monotonic()
+        if self._words is not None and (
+            now - self._checked_at < settings.BANNED_WORDS_CHECK_INTERVAL
+        ):
+            return self._words
+        version = self.version()
+        with self._lock:
+            if self._words is None or version != self._version:
+                self._words = BannedWords(self.load())
+                self._version = version
+            self._checked_at = now
+        return self._words
+
+    def search(self, text):
+        return self.get().search(text)
+
+
+def _chunks(queryset, chunk_size, banned_words=None):
+    """Строки (id, news_id, is_hidden) пачками по возрастанию id.
+
+    Пачки выбираются по ключу id, а не OFFSET, поэтому изменение уже
+    обработанных строк не сдвигает следующие. С banned_words в пачку
+    попадают только комментарии с запрещёнными словами.
+    """
+    fields = ('pk', 'news_id', 'is_hidden')
+    if banned_words:
+        fields += ('text',)
+    queryset = queryset.order_by('pk').values_list(*fields)
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        if banned_words:
+            rows = [row[:3] for row in rows if banned_words.search(row[3])]
+        if rows:
+            yield rows
+
+
+def _moderate(queryset, apply, delta, chunk_size, banned_words, progress):
+    """Применяет apply к пачкам и сдвигает счётчики новостей.
+
+    delta(is_hidden) — на сколько меняется comment_count новости
+    из-за одной строки. Новости с одинаковым сдвигом обновляются
+    одним UPDATE, так что пересчитывать большие треды не нужно.
+    Флаги и новости строк перечитываются уже под блокировкой записи:
+    параллельное скрытие или удаление между выборкой пачки и записью
+    иначе сдвинуло бы счётчик дважды. И выборка, и запись идут
+    в базу для записи: реплика может отставать.
+    """
+    db = router.db_for_write(Comment)
+    queryset = queryset.using(db)
+    done = 0
+    for rows in _chunks(queryset, chunk_size, banned_words):
+        with atomic_write(using=db):
+            chunk = Comment.objects.using(db).filter(
+                pk__in=[pk for pk, _, _ in rows]
+            )
+            shifts = defaultdict(int)
+            for news_id, is_hidden in chunk.select_for_update().values_list(
+                'news_id', 'is_hidden'
+            ):
+                shifts[news_id] += delta(is_hidden)
+            news_by_shift = defaultdict(list)
+            for news_id, shift in shifts.items():
+                news_by_shift[shift].append(news_id)
+            apply(chunk)
+            now = timezone.now()
+            for shift, news_ids in news_by_shift.items():
+                News.objects.using(db).filter(
+                    pk__in=news_ids
+                ).update(
+                    comment_count=Greatest(F('comment_count') + shift, 0),
+                    thread_updated_at=now,
+                )
+        bump_version(HOME_VERSION_KEY)
+        done += len(rows)
+        if progress:
+            progress(done)
+    return done
+
+
+def bulk_hide(queryset, hidden=True, chunk_size=500, banned_words=None,
+              progress=None):
+    """Скрывает (или снова показывает) комментарии пачками UPDATE."""
+    return _moderate(
+        queryset,
+        lambda chunk: chunk.update(is_hidden=hidden),
+        lambda is_hidden: (
+            0 if is_hidden == hidden else (-1 if hidden else 1)
+        ),
+        chunk_size, banned_words, progress
+    )
+
+
+def bulk_delete(queryset, chunk_size=500, banned_words=None, progress=None):
+    """Удаляет комментарии пачками DELETE по списку id.
+
+    Сигналы на строку не отправляются: счётчики и версии тредов
+    сдвигаются одним UPDATE на пачку, версия главной — раз на пачку.
+    """
+    return _moderate(
+        queryset,
+        delete_comments,
+        lambda is_hidden: 0 if is_hidden else -1,
+        chunk_size, banned_words, progress
+    )
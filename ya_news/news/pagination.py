@@ -0,0 +1,62 @@
+"""Курсорная (keyset) пагинация комментариев к новости.
+
+Страница выбирается условием по паре (created, id), а не OFFSET,
+поэтому стоимость запроса не зависит от номера страницы.
+"""
+import base64
+import binascii
+from collections import namedtuple
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+CommentPage = namedtuple(
+    'CommentPage', ('comments', 'next_cursor', 'prev_cursor')
+)
+RenderedComment = namedtuple('RenderedComment', ('pk', 'author_id', 'html'))
+
+
+def encode_cursor(comment):
+    """Курсор — позиция комментария в порядке (created, id)."""
+    raw = f'{comment.created.isoformat()}|{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; на испорченный курсор отвечаем 404."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created, pk = raw.decode().split('|')
+        created, pk = parse_datetime(created), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise Http404('Некорректный курсор.')
+    if created is None:
+        raise Http404('Некорректный курсор.')
+    return created, pk
+
+
+def paginate_comments(queryset, per_page, after=None, before=None):
+    """Возвращает страницу комментариев после или до курсора."""
+    if before:
+        created, pk = decode_cursor(before)
+        rows = list(queryset.filter(
+            Q(created__lt=created) | Q(created=created, pk__lt=pk)
+        ).order_by('-created', '-pk')[:per_page + 1])
+        comments = rows[:per_page][::-1]
+        has_prev, has_next = len(rows) > per_page, bool(comments)
+    else:
+        queryset = queryset.order_by('created', 'pk')
+        if after:
+            created, pk = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(created__gt=created) | Q(created=created, pk__gt=pk)
+            )
+        rows = list(queryset[:per_page + 1])
+        comments = rows[:per_page]
+        has_prev, has_next = bool(after and comments), len(rows) > per_page
+    return CommentPage(
+        comments,
+        encode_cursor(comments[-1]) if has_next else None,
+        encode_cursor(comments[0]) if has_prev else None,
+    )
@@ -1,12 +1,45 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
 from news.models import News, Comment
-from datetime import datetime, timedelta
+from datetime import timedelta
 from django.urls import reverse
+from django.utils import timezone
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def strict_request_budgets(settings):
+    """В тестах превышение бюджета запросов — ошибка, а не warning."""
+    settings.REQUEST_BUDGETS_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш страниц не должен переживать тест."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """Реплика — отдельный файл SQLite со схемой, но без данных."""
+    connections.databases['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    call_command('migrate', database='replica', verbosity=0)
+    settings.DATABASE_REPLICAS = ['replica']
+    yield 'replica'
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
 @pytest.fixture
 def author():
     """Фикстура для создания автора комментария."""
@@ -55,7 +88,7 @@ def multiple_news():
 @pytest.fixture
 def multiple_comments(author, news):
     """Фикстура для создания нескольких комментариев."""
-    now = datetime.now()
+    now = timezone.now()
     comments = [
         Comment(
             news=news,
@@ -133,3 +166,15 @@ def logout_url():
 def signup_url():
     """Фикстура для URL страницы регистрации."""
     return reverse('users:signup')
+
+
+@pytest.fixture
+def metrics_url():
+    """Фикстура для URL страницы метрик."""
+    return reverse('metrics')
+
+
+@pytest.fixture
+def search_url():
+    """Фикстура для URL страницы поиска."""
+    return reverse('news:search')
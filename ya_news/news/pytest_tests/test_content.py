@@ -1,5 +1,14 @@
 import pytest
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
 from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from news.cache import HOME_VERSION_KEY, bump_version, home_page_key
+from news.models import Comment, News
+from news.moderation import bulk_hide
 
 
 @pytest.mark.django_db
@@ -57,3 +66,358 @@ def test_comment_form_availability_to_authenticated_user(
         'Авторизованному пользователю должна быть доступна форма'
         ' для отправки комментария.'
     )
+
+
+@pytest.mark.django_db
+def test_home_page_does_not_load_comments(
+    client, multiple_news, home_url, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        client.get(home_url)
+
+
+@pytest.mark.django_db
+def test_comment_count_on_home_page(client, news, home_url):
+    news.comment_count = 3
+    news.save()
+    response = client.get(home_url)
+    assert 'Комментариев: 3' in response.content.decode(), (
+        'На главной странице должно выводиться число комментариев'
+        ' из News.comment_count.'
+    )
+
+
+@pytest.mark.django_db
+def test_comments_keyset_pagination(
+    client, settings, news, multiple_comments, news_detail_url
+):
+    settings.COMMENTS_PER_PAGE = 2
+    expected = [
+        comment.pk for comment in news.comment_set.order_by('created', 'pk')
+    ]
+    pages = []
+    page = client.get(news_detail_url).context['comment_page']
+    assert page.prev_cursor is None, (
+        'У первой страницы комментариев не должно быть ссылки назад.'
+    )
+    while True:
+        pages.append([comment.pk for comment in page.comments])
+        if page.next_cursor is None:
+            break
+        page = client.get(
+            news_detail_url, {'after': page.next_cursor}
+        ).context['comment_page']
+    assert sum(pages, []) == expected, (
+        'Страницы комментариев должны покрывать весь тред без пропусков'
+        ' и повторов.'
+    )
+    previous = client.get(
+        news_detail_url, {'before': page.prev_cursor}
+    ).context['comment_page']
+    assert [comment.pk for comment in previous.comments] == pages[-2], (
+        'Курсор назад должен вести на предыдущую страницу.'
+    )
+
+
+@pytest.mark.django_db
+def test_invalid_comment_cursor(client, news, news_detail_url):
+    response = client.get(news_detail_url, {'after': 'мусор'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('backend', (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+))
+def test_home_page_cache(
+    client, settings, tmp_path, news, home_url, backend,
+    django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    settings.CACHES = {
+        'default': {'BACKEND': backend, 'LOCATION': str(tmp_path)}
+    }
+    first = client.get(home_url)
+    with django_assert_num_queries(0):
+        second = client.get(home_url)
+    assert second.content == first.content, (
+        'Повторный запрос главной должен отдаваться из кэша.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.create(title='Свежая новость', text='Текст.')
+    assert 'Свежая новость' in client.get(home_url).content.decode(), (
+        'Изменение новостей должно сбрасывать кэш главной.'
+    )
+
+
+@pytest.mark.django_db
+def test_home_page_cache_stampede(
+    client, settings, news, home_url, django_assert_num_queries
+):
+    settings.NEWS_CACHE_LOCK_TIMEOUT = 0
+    stale = client.get(home_url).content
+    bump_version(HOME_VERSION_KEY)
+    cache.add(home_page_key() + ':lock', True)
+    with django_assert_num_queries(0):
+        response = client.get(home_url)
+    assert response.content == stale, (
+        'Пока страницу рендерит другой процесс, отдаётся прошлая версия.'
+    )
+
+
+@pytest.mark.django_db
+def test_comment_thread_fragment_cache(
+    client, comment, news_detail_url, django_assert_num_queries
+):
+    client.get(news_detail_url)
+    with django_assert_num_queries(1):
+        response = client.get(news_detail_url)
+    assert comment.text in response.content.decode(), (
+        'Комментарии должны выводиться из кэша треда.'
+    )
+
+
+@pytest.mark.django_db
+def test_comment_controls_over_cached_thread(
+    client, author, other_user, comment, news_detail_url, comment_edit_url
+):
+    client.force_login(other_user)
+    assert comment_edit_url not in client.get(news_detail_url).content.decode()
+    client.force_login(author)
+    assert comment_edit_url in client.get(news_detail_url).content.decode(), (
+        'Ссылки автора добавляются поверх закэшированного треда.'
+    )
+
+
+@pytest.mark.django_db
+def test_comment_edit_bumps_thread_version(
+    authenticated_client, comment, news_detail_url, comment_edit_url,
+    django_capture_on_commit_callbacks
+):
+    authenticated_client.get(news_detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        authenticated_client.post(
+            comment_edit_url, {'text': 'Исправленный комментарий'}
+        )
+    response = authenticated_client.get(news_detail_url)
+    assert 'Исправленный комментарий' in response.content.decode(), (
+        'Правка комментария должна сбрасывать кэш треда.'
+    )
+
+
+@pytest.fixture
+def search(client, search_url):
+    def search(**params):
+        response = client.get(search_url, params)
+        return response.context.get('search_page')
+    return search
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_above_text_and_comments(search, author):
+    in_comment = News.objects.create(
+        title='Погода', text='Ясно.', date='2023-10-01'
+    )
+    Comment.objects.create(
+        news=in_comment, author=author, text='Грядёт ураган'
+    )
+    in_text = News.objects.create(
+        title='Новости', text='Ожидается ураган.', date='2023-10-02'
+    )
+    in_title = News.objects.create(
+        title='Ураган', text='Подробности.', date='2023-10-03'
+    )
+    page = search(q='ураган')
+    assert page.results == [in_title, in_text, in_comment]
+    assert page.results[2].snippet == 'Грядёт <mark>ураган</mark>'
+
+
+@pytest.mark.django_db
+def test_search_skips_hidden_comments(search, comment):
+    assert search(q='тестовый комментарий').results == [comment.news]
+    comment.is_hidden = True
+    comment.save()
+    assert search(q='комментарий').results == []
+
+
+@pytest.mark.django_db
+def test_search_index_follows_deletes(search, comment):
+    comment.delete()
+    assert search(q='комментарий').results == []
+    News.objects.all().delete()
+    assert search(q='новость').results == []
+
+
+@pytest.mark.django_db
+def test_search_by_date(search, multiple_news):
+    page = search(q='новость', date_from='2023-10-03', date_to='2023-10-04')
+    assert {news.date.day for news in page.results} == {3, 4}
+
+
+@pytest.mark.django_db
+def test_search_pagination(search, multiple_news, settings):
+    settings.NEWS_SEARCH_PER_PAGE = 10
+    first, second = search(q='новость'), search(q='новость', page=2)
+    assert (len(first.results), first.has_next) == (10, True)
+    assert (len(second.results), second.has_next) == (5, False)
+    assert not set(first.results) & set(second.results)
+
+
+@pytest.mark.django_db
+def test_search_without_query(search):
+    assert search(q='') is None
+    assert search(q='?!').results == []
+
+
+FEEDS = pytest.mark.parametrize('feed', ('rss', 'atom', 'json'))
+
+
+@pytest.mark.django_db
+@FEEDS
+def test_feed_lists_latest_news(client, multiple_news, feed, settings):
+    settings.NEWS_FEED_SIZE = 3
+    content = client.get(reverse(f'news:feed_{feed}')).content.decode()
+    assert content.count('Новость') == 3
+    assert 'Новость 14' in content
+    assert 'Новость 11' not in content
+
+
+@pytest.mark.django_db
+@FEEDS
+def test_feed_conditional_get(
+    client, news, feed, django_assert_num_queries,
+    django_capture_on_commit_callbacks
+):
+    url = reverse(f'news:feed_{feed}')
+    response = client.get(url)
+    etag, modified = response['ETag'], response['Last-Modified']
+    # Валидаторы берутся из БД: по запросу на каждый ответ.
+    with django_assert_num_queries(2):
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=modified
+        ).status_code == HTTPStatus.NOT_MODIFIED
+    with django_capture_on_commit_callbacks(execute=True):
+        news.title = 'Новый заголовок'
+        news.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+    assert 'Новый заголовок' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_feed_body_cached_between_changes(
+    client, news, comment, django_assert_num_queries,
+    django_capture_on_commit_callbacks
+):
+    url = reverse('news:feed_rss')
+    client.get(url)
+    # Комментарии в ленту не входят и не сбрасывают её кэш.
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(
+            news=news, author=comment.author, text='Ещё комментарий'
+        )
+    with django_assert_num_queries(1):
+        assert client.get(url).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_feed_changes_when_news_deleted(client, multiple_news):
+    url = reverse('news:feed_rss')
+    etag = client.get(url)['ETag']
+    stamps = dict(News.objects.values_list('pk', 'updated_at'))
+    News.objects.order_by('updated_at').first().delete()
+    assert dict(News.objects.values_list('pk', 'updated_at')).items() <= (
+        stamps.items()
+    ), 'Удаление не должно менять время правки других новостей.'
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_feed_body_cached_per_host(client, news, settings):
+    settings.ALLOWED_HOSTS = ['testserver', 'mirror.example']
+    url = reverse('news:feed_json')
+    client.get(url)
+    content = client.get(url, HTTP_HOST='mirror.example').content.decode()
+    assert 'http://mirror.example/' in content
+    assert 'testserver' not in content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('header, response_header', (
+    ('HTTP_IF_NONE_MATCH', 'ETag'),
+    ('HTTP_IF_MODIFIED_SINCE', 'Last-Modified'),
+))
+def test_unchanged_news_is_not_modified(
+    client, comment, news_detail_url, header, response_header,
+    django_assert_num_queries
+):
+    validator = client.get(news_detail_url)[response_header]
+    with django_assert_num_queries(1):
+        response = client.get(news_detail_url, **{header: validator})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.templates == []
+
+
+@pytest.mark.django_db
+def test_news_etag_follows_thread(
+    client, author, news, comment, news_detail_url,
+    django_capture_on_commit_callbacks
+):
+    etags = [client.get(news_detail_url)['ETag']]
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.text = 'Исправленный комментарий'
+        comment.save()
+    etags.append(client.get(news_detail_url)['ETag'])
+    with django_capture_on_commit_callbacks(execute=True):
+        news.title = 'Исправленная новость'
+        news.save()
+    etags.append(client.get(news_detail_url)['ETag'])
+    Comment.objects.create(news=news, author=author, text='Новый')
+    News.objects.refresh_comment_count()
+    etags.append(client.get(news_detail_url)['ETag'])
+    client.force_login(author)
+    etags.append(client.get(news_detail_url)['ETag'])
+    assert len(set(etags)) == len(etags)
+
+
+@pytest.mark.django_db
+def test_news_etag_changes_after_new_login(
+    client, author, news_detail_url
+):
+    login_url = reverse('users:login')
+    credentials = {'username': author.username, 'password': 'password'}
+    client.post(login_url, credentials)
+    response = client.get(news_detail_url)
+    assert 'Last-Modified' not in response
+    etag = response['ETag']
+    client.get(reverse('users:logout'))
+    client.post(login_url, credentials)
+    response = client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        'После нового входа страница с формой должна прийти '
+        'с новым токеном CSRF, а не 304.'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('change', ('edit', 'delete', 'hide'))
+def test_news_last_modified_follows_comments(
+    client, comment, news_detail_url, change
+):
+    modified = client.get(news_detail_url)['Last-Modified']
+    later = timezone.now() + timedelta(minutes=1)
+    with mock.patch('django.utils.timezone.now', return_value=later):
+        if change == 'edit':
+            comment.text = 'Исправленный комментарий'
+            comment.save()
+        elif change == 'delete':
+            comment.delete()
+        else:
+            bulk_hide(Comment.objects.filter(pk=comment.pk))
+    response = client.get(news_detail_url, HTTP_IF_MODIFIED_SINCE=modified)
+    assert response.status_code == HTTPStatus.OK
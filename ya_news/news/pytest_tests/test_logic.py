@@ -1,8 +1,20 @@
 import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from news.models import Comment
+from news import async_views
+from news.models import BannedWord, Comment, News
 from http import HTTPStatus
-from news.forms import BAD_WORDS, WARNING
+from news.forms import BAD_WORDS, WARNING, banned_words
+from news.moderation import BannedWords, bulk_delete, load_words
+from yanews.routers import PIN_COOKIE
+
+User = get_user_model()
 
 
 @pytest.mark.django_db
@@ -49,6 +61,10 @@ def test_authenticated_user_can_post_comment(
     assert comment.news == news, (
         'Комментарий должен быть связан с правильной новостью.'
     )
+    news.refresh_from_db()
+    assert news.comment_count == 1, (
+        'Счётчик комментариев новости должен увеличиться.'
+    )
 
 
 @pytest.mark.django_db
@@ -176,3 +192,337 @@ def test_authenticated_user_cannot_delete_other_users_comment(
     assert Comment.objects.filter(pk=comment.pk).exists(), (
         'Комментарий должен остаться в базе данных после попытки удаления.'
     )
+
+
+@pytest.mark.django_db
+def test_delete_comment_decrements_comment_count(
+    authenticated_client, delete_url, comment, news
+):
+    News.objects.filter(pk=news.pk).update(comment_count=1)
+    authenticated_client.post(delete_url)
+    news.refresh_from_db()
+    assert news.comment_count == 0, (
+        'Счётчик комментариев новости должен уменьшиться.'
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(news, multiple_comments):
+    News.objects.filter(pk=news.pk).update(comment_count=100)
+    call_command('recount_comments')
+    news.refresh_from_db()
+    assert news.comment_count == len(multiple_comments), (
+        'Команда recount_comments должна восстановить счётчик.'
+    )
+
+
+# Сессия и пользователь — два запроса; SAVEPOINT и RELEASE появляются
+# из-за транзакции, в которую pytest-django оборачивает тест. Список
+# запрещённых слов загружается заранее: перезагрузка идёт не на каждый
+# комментарий. Ещё один UPDATE сдвигает версию треда в новости.
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, data, queries', (
+    (pytest.lazy_fixture('detail_url'), {'text': 'Новый комментарий'}, 6),
+    (pytest.lazy_fixture('edit_url'), {'text': 'Новый текст'}, 5),
+    (pytest.lazy_fixture('delete_url'), None, 7),
+))
+def test_comment_write_query_count(
+    authenticated_client, url, data, queries, django_assert_num_queries
+):
+    banned_words.get()
+    with django_assert_num_queries(queries):
+        response = authenticated_client.post(url, data=data)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, data', (
+    (pytest.lazy_fixture('detail_url'), {'text': 'Новый комментарий'}),
+    (pytest.lazy_fixture('delete_url'), None),
+))
+def test_comment_write_moves_thread_stamp(
+    authenticated_client, news, url, data
+):
+    stamp = News.objects.get(pk=news.pk).thread_updated_at
+    authenticated_client.post(url, data=data)
+    assert News.objects.get(pk=news.pk).thread_updated_at > stamp, (
+        'Версия треда сдвигается тем же UPDATE, что и счётчик.'
+    )
+
+
+@pytest.mark.django_db
+def test_comment_to_missing_news(authenticated_client, news, detail_url):
+    news.delete()
+    response = authenticated_client.post(
+        detail_url, data={'text': 'Комментарий'}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert Comment.objects.count() == 0, (
+        'Комментарий к несуществующей новости не должен сохраняться.'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('text', (
+    'РЕДИСКА',
+    'Ты — НегодЯй',
+    'pедиcкa',
+    'He r0дяй, а нег0дяй',
+))
+def test_obfuscated_bad_words_are_rejected(
+    authenticated_client, detail_url, text
+):
+    response = authenticated_client.post(detail_url, data={'text': text})
+    assert WARNING in response.context['form'].errors['text'], (
+        'Регистр и похожие латинские буквы не должны обходить фильтр.'
+    )
+
+
+def test_banned_words_from_file(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_text('# модерация\nмерзавец\n\n', encoding='utf-8')
+    words = BannedWords(load_words(path))
+    assert words.search('Вот мерзавец!') == 'мерзавец'
+    assert words.search('Обычный комментарий') is None
+
+
+@pytest.mark.django_db
+def test_banned_word_from_admin_list(
+    authenticated_client, settings, detail_url,
+    django_capture_on_commit_callbacks
+):
+    settings.BANNED_WORDS_CHECK_INTERVAL = 0
+    comment_data = {'text': 'Какой мерзавец!'}
+    authenticated_client.post(detail_url, data=comment_data)
+    with django_capture_on_commit_callbacks(execute=True):
+        BannedWord.objects.create(word='Мерзавец')
+    response = authenticated_client.post(detail_url, data=comment_data)
+    assert WARNING in response.context['form'].errors['text'], (
+        'Слово, добавленное в админке, должно применяться без перезапуска.'
+    )
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_missing_bad_words_file(
+    authenticated_client, settings, tmp_path, detail_url
+):
+    settings.BANNED_WORDS_CHECK_INTERVAL = 0
+    settings.BAD_WORDS_FILE = str(tmp_path / 'missing.txt')
+    response = authenticated_client.post(
+        detail_url, data={'text': 'Обычный комментарий'}
+    )
+    assert response.status_code == HTTPStatus.FOUND, (
+        'Пропавший файл слов не должен ломать отправку комментариев.'
+    )
+    response = authenticated_client.post(
+        detail_url, data={'text': 'Ну и редиска'}
+    )
+    assert WARNING in response.context['form'].errors['text']
+
+
+@pytest.mark.django_db
+def test_moderate_comments_delete_by_author(
+    news, other_user, multiple_comments
+):
+    Comment.objects.create(news=news, author=other_user, text='Останусь.')
+    News.objects.refresh_comment_count()
+    call_command(
+        'moderate_comments', 'delete', '--author', 'author',
+        '--chunk-size', '2', stdout=StringIO()
+    )
+    assert list(Comment.objects.values_list('author', flat=True)) == [
+        other_user.pk
+    ], 'Должны удалиться только комментарии указанного автора.'
+    news.refresh_from_db()
+    assert news.comment_count == 1, (
+        'После массового удаления счётчик должен быть пересчитан.'
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_delete_updates_news_once_per_chunk(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Спам {index}')
+        for index in range(30)
+    )
+    News.objects.refresh_comment_count()
+    with CaptureQueriesContext(connection) as context:
+        assert bulk_delete(Comment.objects.all()) == 30
+    news_updates = [
+        query for query in context.captured_queries
+        if query['sql'].startswith('UPDATE "news_news"')
+    ]
+    assert len(news_updates) == 1, (
+        'Удаление пачки не должно обновлять новость на каждый комментарий.'
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_news_delete_removes_thread_in_one_query(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(30)
+    )
+    with CaptureQueriesContext(connection) as context:
+        news.delete()
+    assert not Comment.objects.exists()
+    assert not [
+        query for query in context.captured_queries
+        if 'thread_updated_at' in query['sql']
+    ], 'Каскад не должен сдвигать версию треда удаляемой новости.'
+
+
+@pytest.mark.django_db
+def test_admin_comment_delete_and_hide_keep_count(admin_client, news, author):
+    first, second = (
+        Comment.objects.create(news=news, author=author, text=text)
+        for text in ('Первый', 'Второй')
+    )
+    News.objects.refresh_comment_count()
+    admin_client.post(
+        reverse('admin:news_comment_delete', args=[first.pk]), {'post': 'yes'}
+    )
+    assert not Comment.objects.filter(pk=first.pk).exists()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    admin_client.post(
+        reverse('admin:news_comment_change', args=[second.pk]),
+        {'news': news.pk, 'author': author.pk, 'text': 'Второй',
+         'is_hidden': 'on'},
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 0, (
+        'Скрытие в форме админки должно менять счётчик комментариев.'
+    )
+
+
+@pytest.mark.django_db
+def test_admin_moderation_actions_need_change_permission(client, comment):
+    staff = User.objects.create_user(
+        username='viewer', password='password', is_staff=True
+    )
+    staff.user_permissions.add(*Permission.objects.filter(
+        codename__in=('view_comment', 'delete_comment')
+    ))
+    client.force_login(staff)
+    response = client.get(reverse('admin:news_comment_changelist'))
+    actions = response.context['action_form'].fields['action'].choices
+    assert {name for name, _ in actions} - {''} == {'delete_comments'}, (
+        'Скрывать комментарии может только тот, кому можно их менять.'
+    )
+
+
+@pytest.mark.django_db
+def test_moderate_comments_hide_banned(client, news, author, detail_url):
+    Comment.objects.create(news=news, author=author, text='Ну и редиска')
+    Comment.objects.create(news=news, author=author, text='Хорошая новость')
+    News.objects.refresh_comment_count()
+    call_command('moderate_comments', 'hide', '--banned', stdout=StringIO())
+    hidden = Comment.objects.get(is_hidden=True)
+    assert hidden.text == 'Ну и редиска'
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert hidden.text not in client.get(detail_url).content.decode(), (
+        'Скрытые комментарии не выводятся на странице новости.'
+    )
+
+
+@pytest.mark.django_db
+def test_moderate_comments_requires_filter():
+    with pytest.raises(CommandError):
+        call_command('moderate_comments', 'delete')
+
+
+@pytest.mark.django_db
+def test_moderate_command_works_on_primary(replica, news, comment):
+    call_command(
+        'moderate_comments', 'delete', news=news.pk, stdout=StringIO()
+    )
+    assert not Comment.objects.using('default').exists(), (
+        'Команда выбирает и удаляет комментарии в основной базе.'
+    )
+    news.refresh_from_db(using='default')
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_reads_stick_to_primary_after_comment(
+    replica, authenticated_client, detail_url
+):
+    response = authenticated_client.get(detail_url)
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Новости читаются с реплики, а на ней новости ещё нет.'
+    )
+    response = authenticated_client.post(
+        detail_url, data={'text': 'Свой комментарий'}
+    )
+    assert PIN_COOKIE in response.cookies, (
+        'После записи пользователь закрепляется за основной базой.'
+    )
+    assert not Comment.objects.using(replica).exists()
+    response = authenticated_client.get(detail_url)
+    assert 'Свой комментарий' in response.content.decode(), (
+        'Сразу после записи пользователь видит свой комментарий.'
+    )
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous, = cursor.fetchone()
+        cursor.execute('PRAGMA busy_timeout')
+        busy_timeout, = cursor.fetchone()
+    assert (synchronous, busy_timeout) == (1, 5000), (
+        'Соединение настраивается прагмами из SQLITE_PRAGMAS.'
+    )
+
+
+@pytest.mark.django_db
+def test_seed_news_consistent_counters():
+    call_command(
+        'seed_news', users=3, news=5, comments=50, stdout=StringIO()
+    )
+    assert Comment.objects.count() == 50
+    for news in News.objects.all():
+        assert news.comment_count == news.comment_set.count(), (
+            'Счётчик комментариев заполняется сразу при генерации.'
+        )
+    with pytest.raises(CommandError):
+        call_command('seed_news', users=1, news=1, stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_seed_news_keeps_comment_dates():
+    User.objects.create_user(username='seeder')
+    call_command('seed_news', users=2, news=3, comments=20, stdout=StringIO())
+    for comment in Comment.objects.select_related('news'):
+        assert comment.created.date() >= comment.news.date, (
+            'Время комментария задаёт генератор, а не текущий момент.'
+        )
+    assert Comment.objects.dates('created', 'day').count() > 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_read_views(
+    settings, authenticated_client, author, comment, detail_url
+):
+    settings.ROOT_URLCONF = 'yanews.async_urls'
+    response = authenticated_client.get(reverse('news:home'))
+    assert comment.news.title in response.content.decode()
+    response = authenticated_client.get(detail_url)
+    assert response.resolver_match.func.view_class is async_views.NewsDetail
+    assert comment.text in response.content.decode()
+    # Первый ответ выдал cookie CSRF, а он входит в ETag страницы с формой.
+    response = authenticated_client.get(detail_url)
+    response = authenticated_client.get(
+        detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Асинхронная страница новости тоже отдаёт 304 по ETag.'
+    )
+    authenticated_client.post(detail_url, {'text': 'Из ASGI'})
+    assert Comment.objects.filter(text='Из ASGI', author=author).exists()
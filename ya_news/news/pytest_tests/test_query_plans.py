@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+
+
+def query_plans(client, url, data=None):
+    """Планы запросов SQLite для всех SELECT, выполненных страницей."""
+    with CaptureQueriesContext(connection) as context:
+        client.get(url, data)
+    plans = {}
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+            plans[query['sql']] = [row[-1] for row in cursor.fetchall()]
+    return plans
+
+
+def assert_index_backed(plans):
+    for sql, plan in plans.items():
+        for step in plan:
+            assert 'TEMP B-TREE' not in step, (
+                f'Запрос сортирует во временном B-дереве: {sql}\n{plan}'
+            )
+            assert not step.startswith('SCAN') or 'INDEX' in step, (
+                f'Запрос читает таблицу целиком: {sql}\n{plan}'
+            )
+
+
+@pytest.mark.django_db
+def test_home_page_query_plan(client, multiple_news, home_url):
+    assert_index_backed(query_plans(client, home_url))
+
+
+@pytest.mark.django_db
+def test_news_detail_query_plan(
+    authenticated_client, settings, news, multiple_comments, news_detail_url
+):
+    settings.COMMENTS_PER_PAGE = 2
+    assert_index_backed(query_plans(authenticated_client, news_detail_url))
+    page = authenticated_client.get(news_detail_url).context['comment_page']
+    assert_index_backed(query_plans(
+        authenticated_client, news_detail_url, {'after': page.next_cursor}
+    ))
+    assert_index_backed(query_plans(
+        authenticated_client, news_detail_url, {'before': page.next_cursor}
+    ))
+
+
+@pytest.mark.django_db
+def test_comment_edit_query_plan(authenticated_client, comment_edit_url):
+    assert_index_backed(query_plans(authenticated_client, comment_edit_url))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('feed', ('rss', 'atom', 'json'))
+def test_feed_query_plan(client, multiple_news, feed):
+    assert_index_backed(query_plans(client, reverse(f'news:feed_{feed}')))
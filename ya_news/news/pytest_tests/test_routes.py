@@ -1,5 +1,6 @@
 import pytest
 from http import HTTPStatus
+from yanews.metrics import BudgetExceeded, registry
 
 
 @pytest.mark.django_db
@@ -10,6 +11,7 @@ def test_all_pages_access(
     news,
     comment,
     home_url,
+    search_url,
     news_detail_url,
     comment_edit_url,
     comment_delete_url,
@@ -21,6 +23,9 @@ def test_all_pages_access(
         # Главная страница доступна анонимному пользователю.
         [home_url, None, HTTPStatus.OK],
 
+        # Поиск доступен анонимному пользователю.
+        [search_url, None, HTTPStatus.OK],
+
         # Страница отдельной новости доступна анонимному пользователю.
         [news_detail_url, None, HTTPStatus.OK],
 
@@ -61,3 +66,43 @@ def test_all_pages_access(
         # Дополнительные проверки для редиректов
         if expected_status == HTTPStatus.FOUND:
             assert response.url.startswith(login_url)
+
+
+@pytest.mark.django_db
+def test_metrics_page_for_staff_only(client, author, home_url, metrics_url):
+    client.get(home_url)
+    client.force_login(author)
+    assert client.get(metrics_url).status_code == HTTPStatus.FOUND
+    author.is_staff = True
+    author.save()
+    response = client.get(metrics_url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'queries' in response.json()['news:home'], (
+        'Страница метрик должна отдавать гистограммы по имени URL.'
+    )
+
+
+@pytest.mark.django_db
+def test_query_budget_exceeded(client, settings, caplog, home_url):
+    settings.REQUEST_BUDGETS = {'news:home': {'queries': 0}}
+    with pytest.raises(BudgetExceeded):
+        client.get(home_url)
+    settings.REQUEST_BUDGETS_STRICT = False
+    client.get(home_url)
+    assert 'news:home' in caplog.text, (
+        'Без строгого режима превышение бюджета пишется в лог.'
+    )
+
+
+@pytest.mark.django_db
+def test_template_time_counts_render_to_string(
+    client, comment, home_url, detail_url
+):
+    registry.reset()
+    client.get(home_url)
+    client.get(detail_url)
+    snapshot = registry.snapshot()
+    for view_name in ('news:home', 'news:detail'):
+        assert snapshot[view_name]['template_ms']['sum'] > 0, (
+            'Время рендеринга учитывает и страницы вне TemplateResponse.'
+        )
@@ -0,0 +1,163 @@
+"""Полнотекстовый поиск по новостям и комментариям.
+
+На SQLite запрос идёт в индексы FTS5 news_news_fts и news_comment_fts
+(см. миграцию 0006_search_index), базовые таблицы не сканируются.
+Новость ранжируется по лучшему совпадению: в заголовке, в тексте
+или в одном из её видимых комментариев; bm25 даёт заголовку больший
+вес, а совпадение в комментарии весит меньше совпадения в новости.
+Фрагменты с подсветкой строятся только для новостей текущей страницы.
+
+Для почти стоп-слов, которые есть в большинстве записей, точный bm25
+пришлось бы считать по сотням тысяч совпадений. Поэтому из каждого
+индекса ранжируются только SEARCH_CANDIDATES самых свежих совпадений
+(FTS5 отдаёт их по убыванию rowid и останавливается на лимите);
+для более редких слов ранжирование точное.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+
+TOKEN = re.compile(r'\w+')
+
+# Служебные символы вместо тегов: текст сначала экранируется,
+# и только потом они заменяются на <mark>.
+MARK_START, MARK_END = '\x02', '\x03'
+
+# Множитель bm25 для совпадений в комментариях (bm25 отрицателен:
+# чем меньше, тем лучше).
+COMMENT_WEIGHT = 0.5
+
+SEARCH_CANDIDATES = 2000
+
+SearchPage = namedtuple('SearchPage', 'results number has_next')
+
+SEARCH_SQL = '''
+    WITH hits(news_id, score, source, source_id) AS (
+        SELECT * FROM (
+            SELECT news.id, bm25(news_news_fts, 5.0, 1.0), 'news', news.id
+            FROM news_news_fts
+            JOIN news_news AS news ON news.id = news_news_fts.rowid
+            WHERE news_news_fts MATCH %s {dates}
+            ORDER BY news_news_fts.rowid DESC
+            LIMIT %s
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT comment.news_id, bm25(news_comment_fts) * %s,
+                   'comment', comment.id
+            FROM news_comment_fts
+            JOIN news_comment AS comment
+                ON comment.id = news_comment_fts.rowid
+            {comment_news}
+            WHERE news_comment_fts MATCH %s {dates}
+            ORDER BY news_comment_fts.rowid DESC
+            LIMIT %s
+        )
+    )
+    SELECT news.id, news.title, news.date, news.comment_count,
+           min(hits.score) AS score, hits.source, hits.source_id
+    FROM hits
+    JOIN news_news AS news ON news.id = hits.news_id
+    GROUP BY news.id
+    ORDER BY score, news.id
+    LIMIT %s OFFSET %s
+'''
+
+# Новость комментария нужна только для фильтра по дате.
+COMMENT_NEWS_JOIN = 'JOIN news_news AS news ON news.id = comment.news_id'
+
+SNIPPET_SQL = {
+    'news': '''
+        SELECT rowid, snippet(news_news_fts, -1, %s, %s, '…', 16)
+        FROM news_news_fts
+        WHERE news_news_fts MATCH %s AND rowid IN ({ids})
+    ''',
+    'comment': '''
+        SELECT rowid, snippet(news_comment_fts, 0, %s, %s, '…', 16)
+        FROM news_comment_fts
+        WHERE news_comment_fts MATCH %s AND rowid IN ({ids})
+    ''',
+}
+
+
+def match_expression(query):
+    """Все слова запроса, каждое — как префикс."""
+    return ' '.join(f'"{token}"*' for token in TOKEN.findall(query))
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def date_condition(date_from, date_to):
+    conditions, params = [], []
+    if date_from:
+        conditions.append('AND news.date >= %s')
+        params.append(date_from.isoformat())
+    if date_to:
+        conditions.append('AND news.date <= %s')
+        params.append(date_to.isoformat())
+    return ' '.join(conditions), params
+
+
+def add_snippets(results, expression):
+    """Фрагмент лучшего совпадения для каждой новости страницы."""
+    sources = {}
+    for news in results:
+        sources.setdefault(news.source, {})[news.source_id] = news
+    with connection.cursor() as cursor:
+        for source, by_id in sources.items():
+            cursor.execute(
+                SNIPPET_SQL[source].format(ids=', '.join(['%s'] * len(by_id))),
+                [MARK_START, MARK_END, expression, *by_id],
+            )
+            for source_id, snippet in cursor.fetchall():
+                by_id[source_id].snippet = highlight(snippet)
+
+
+def fallback_search(query, date_from, date_to):
+    queryset = News.objects.filter(
+        Q(title__icontains=query) | Q(text__icontains=query)
+        | Q(comment__text__icontains=query, comment__is_hidden=False)
+    ).distinct()
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    return queryset.order_by('-date', 'pk')
+
+
+def search_news(query, per_page, page=1, date_from=None, date_to=None):
+    """Страница новостей, подходящих под запрос, от лучших к худшим."""
+    expression = match_expression(query)
+    if not expression:
+        return SearchPage([], page, False)
+    offset = (page - 1) * per_page
+    if connection.vendor != 'sqlite':
+        results = list(
+            fallback_search(query, date_from, date_to)
+            [offset:offset + per_page + 1]
+        )
+    else:
+        dates, params = date_condition(date_from, date_to)
+        results = list(News.objects.raw(
+            SEARCH_SQL.format(
+                dates=dates,
+                comment_news=COMMENT_NEWS_JOIN if dates else '',
+            ),
+            [expression, *params, SEARCH_CANDIDATES,
+             COMMENT_WEIGHT, expression, *params, SEARCH_CANDIDATES,
+             per_page + 1, offset],
+        ))
+        add_snippets(results[:per_page], expression)
+    return SearchPage(results[:per_page], page, len(results) > per_page)
@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import HOME_VERSION_KEY, bump_version
+from .models import Comment, FeedVersion, News
+
+
+@receiver((post_save, post_delete), sender=News)
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_home_page(sender, **kwargs):
+    """Главная зависит от новостей и счётчиков комментариев.
+
+    Версия меняется после коммита, иначе параллельный запрос успеет
+    закэшировать старые данные под новой версией.
+    """
+    transaction.on_commit(lambda: bump_version(HOME_VERSION_KEY))
+
+
+@receiver((post_save, post_delete), sender=News)
+def invalidate_feeds(sender, using, **kwargs):
+    """Сдвигает версию лент в той же транзакции, что и запись новости."""
+    FeedVersion.touch(using)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_comment_thread(sender, instance, using, **kwargs):
+    """Создание, правка или удаление комментария меняет версию треда.
+
+    Версия хранится в самой новости, в той же транзакции. Создание
+    и удаление из представлений сдвигают её сами вместе со счётчиком.
+    """
+    if instance.thread_stamped:
+        return
+    News.objects.using(using).filter(pk=instance.news_id).update(
+        thread_updated_at=timezone.now()
+    )
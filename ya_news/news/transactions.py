@@ -0,0 +1,26 @@
+"""Транзакции записи комментариев.
+
+Удаление сначала читает комментарий, а триггеры полнотекстового
+индекса (миграция 0006_search_index) читают служебные таблицы FTS5
+ещё до того, как запись возьмёт блокировку. В отложенной транзакции
+SQLite не может превратить такое чтение в запись, если кто-то успел
+записать раньше, и сразу отвечает «database is locked», не дожидаясь
+таймаута. Поэтому внешняя транзакция записи на SQLite первым делом
+берёт блокировку пустым UPDATE. Django 3.2 сам открывает транзакцию
+простым BEGIN, так что BEGIN IMMEDIATE здесь недоступен.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def atomic_write(using=None):
+    """transaction.atomic, сразу берущий блокировку на запись."""
+    connection = transaction.get_connection(using)
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        if outermost and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('UPDATE news_news SET id = id WHERE 0')
+        yield
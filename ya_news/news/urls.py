@@ -1,11 +1,15 @@
 from django.urls import path
 
-from news import views
+from news import feeds, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('feed/rss/', feeds.news_feed, {'kind': 'rss'}, name='feed_rss'),
+    path('feed/atom/', feeds.news_feed, {'kind': 'atom'}, name='feed_atom'),
+    path('feed/json/', feeds.news_feed, {'kind': 'json'}, name='feed_json'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
     path(
         'delete_comment/<int:pk>/',
@@ -1,11 +1,24 @@
+import hashlib
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
 from django.views import generic
 
-from .forms import CommentForm
+from .cache import (
+    cached_comment_page, cached_page, conditional_response, home_page_key
+)
+from .forms import CommentForm, SearchForm
 from .models import Comment, News
+from .pagination import RenderedComment, paginate_comments
+from .search import search_news
+from .transactions import atomic_write
 
 
 class NewsList(generic.ListView):
@@ -13,34 +26,136 @@ class NewsList(generic.ListView):
     model = News
     template_name = 'news/home.html'
 
+    def get(self, request, *args, **kwargs):
+        """Анонимные посетители получают страницу из кэша."""
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        render = super().get
+        return HttpResponse(cached_page(
+            home_page_key(),
+            lambda: render(request, *args, **kwargs).render().content
+        ))
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев берётся из News.comment_count,
+        сами комментарии не загружаются.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и комментариям к ним."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = SearchForm(self.request.GET)
+        context['form'] = form
+        if form.is_valid() and form.cleaned_data['q']:
+            data = form.cleaned_data
+            params = self.request.GET.copy()
+            params.pop('page', None)
+            context['query_string'] = params.urlencode()
+            context['search_page'] = search_news(
+                data['q'],
+                settings.NEWS_SEARCH_PER_PAGE,
+                page=data['page'] or 1,
+                date_from=data['date_from'],
+                date_to=data['date_to'],
+            )
+        return context
 
 
 class NewsDetail(generic.DetailView):
+    """Новость с комментариями.
+
+    Если у клиента текущая версия страницы, он получает 304
+    без загрузки комментариев и рендеринга шаблона.
+    """
     model = News
     template_name = 'news/detail.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get(self, request, *args, **kwargs):
+        """Валидаторы считаются по той же новости, что попадёт в шаблон."""
+        self.object = self.get_object()
+        return conditional_response(
+            request, self.get_etag(), self.get_last_modified(),
+            lambda: self.render_to_response(
+                self.get_context_data(object=self.object)
+            ),
         )
-        return obj
+
+    def get_etag(self):
+        """Значение ETag для страницы новости.
+
+        Правку новости отмечает updated_at, любую запись в её
+        комментарии — thread_updated_at. Страница зависит ещё
+        от пользователя, курсора комментариев и, если выводится
+        форма, от секрета CSRF: после нового входа он другой,
+        и токен из старой страницы отправку уже не пройдёт.
+        """
+        user = self.request.user
+        key = ':'.join(map(str, (
+            self.object.updated_at.timestamp(),
+            self.object.thread_updated_at.timestamp(),
+            self.object.comment_count,
+            user.pk,
+            self.request.GET.urlencode(),
+            self.request.META.get('CSRF_COOKIE', '')
+            if user.is_authenticated else '',
+        )))
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def get_last_modified(self):
+        """Last-Modified только для анонимных посетителей.
+
+        Время правки не учитывает пользователя и токен формы.
+        """
+        if self.request.user.is_authenticated:
+            return None
+        return max(self.object.updated_at, self.object.thread_updated_at)
 
     def get_context_data(self, **kwargs):
+        """Комментарии выводятся постранично, по курсору из запроса.
+
+        Страница треда рендерится один раз на версию треда и берётся
+        из кэша; ссылки автора добавляет шаблон поверх готового HTML.
+        """
         context = super().get_context_data(**kwargs)
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+        context['comment_page'] = cached_comment_page(
+            self.object, after, before,
+            lambda: self.render_comment_page(after, before)
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
+    def render_comment_page(self, after, before):
+        page = paginate_comments(
+            self.object.comment_set.filter(
+                is_hidden=False
+            ).select_related('author'),
+            settings.COMMENTS_PER_PAGE,
+            after=after,
+            before=before,
+        )
+        return page._replace(comments=[
+            RenderedComment(
+                comment.pk,
+                comment.author_id,
+                render_to_string(
+                    'includes/comment.html', {'comment': comment}
+                ),
+            )
+            for comment in page.comments
+        ])
+
 
 class NewsComment(
         LoginRequiredMixin,
@@ -52,19 +167,35 @@ class NewsComment(
     template_name = 'news/detail.html'
 
     def post(self, request, *args, **kwargs):
+        """Новость загружаем, только если форму надо показать снова."""
+        form = self.get_form()
+        if form.is_valid():
+            return self.form_valid(form)
         self.object = self.get_object()
-        return super().post(request, *args, **kwargs)
+        return self.form_invalid(form)
 
     def form_valid(self, form):
+        """Счётчик обновляется раньше вставки и заодно проверяет новость.
+
+        Тем же UPDATE сдвигается версия треда.
+        """
         comment = form.save(commit=False)
-        comment.news = self.object
+        comment.news_id = self.kwargs['pk']
         comment.author = self.request.user
-        comment.save()
+        comment.thread_stamped = True
+        with transaction.atomic():
+            if not News.objects.filter(pk=comment.news_id).update(
+                comment_count=F('comment_count') + 1,
+                thread_updated_at=timezone.now(),
+            ):
+                raise Http404('Новость не найдена.')
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.kwargs['pk']}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +214,18 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """Пользователь может работать только со своими комментариями.
+
+        Заголовок новости нужен шаблонам, поэтому берём её тем же запросом.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +237,21 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        """Удаляем комментарий и уменьшаем счётчик новости.
+
+        Скрытые комментарии в счётчике не учтены. Версия треда
+        сдвигается тем же UPDATE.
+        """
+        with atomic_write():
+            self.object = self.get_object()
+            success_url = self.get_success_url()
+            self.object.thread_stamped = True
+            self.object.delete()
+            shift = 0 if self.object.is_hidden else -1
+            News.objects.filter(pk=self.object.news_id).update(
+                comment_count=Greatest(F('comment_count') + shift, 0),
+                thread_updated_at=timezone.now(),
+            )
+        return HttpResponseRedirect(success_url)
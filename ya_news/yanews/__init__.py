@@ -0,0 +1 @@
+from . import sqlite  # noqa: F401
@@ -0,0 +1,12 @@
+"""URL проекта с асинхронными страницами чтения.
+
+Для запуска под ASGI: ROOT_URLCONF = 'yanews.async_urls'.
+"""
+from django.urls import include, path
+
+from yanews import urls
+
+urlpatterns = [path('', include('news.async_urls'))] + [
+    pattern for pattern in urls.urlpatterns
+    if getattr(pattern, 'app_name', None) != 'news'
+]
@@ -0,0 +1,95 @@
+"""Асинхронные CBV для ASGI.
+
+В Django 3.2 View.as_view всегда возвращает синхронную функцию,
+и обработчик ASGI уносит в поток всё представление целиком.
+AsyncView.as_view возвращает корутину: диспетчеризация идёт в цикле
+событий, а обработчики методов объявляются через ``async def``.
+Асинхронного ORM в 3.2 нет, поэтому работа с БД и кэшем выполняется
+через sync_to_async.
+
+thread_sensitive-вызовы Django 3.2 выполняет в одном общем потоке
+на процесс, и запросы к БД разных запросов шли бы по очереди. Поэтому
+in_thread по умолчанию уносит обработчик в пул потоков цикла событий
+(thread_sensitive=False), там же рендерится TemplateResponse.
+Соединения пула живут по CONN_MAX_AGE: как и в синхронном запросе,
+вокруг вызова выполняется close_old_connections. Обработчик в пуле
+не видит незакоммиченных данных других потоков, поэтому тесты таких
+страниц транзакционные. Записи оставляются thread_sensitive.
+
+Миксины доступа вроде LoginRequiredMixin проверяют пользователя ещё
+в цикле событий, поэтому для них он загружается заранее; остальным
+представлениям он достаётся уже в потоке.
+"""
+import asyncio
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import AccessMixin
+from django.db import close_old_connections
+from django.views import generic
+
+from yanews.metrics import install_counter
+
+
+def load_user(request):
+    """Загружает ленивого пользователя из сессии.
+
+    Вызывается в потоке: в цикле событий обращение к БД запрещено.
+    """
+    if hasattr(request, 'user'):
+        request.user.is_authenticated
+
+
+def pooled(func):
+    """Функция для пула потоков: счётчик метрик, старые соединения."""
+    def run(*args, **kwargs):
+        install_counter()
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return run
+
+
+def in_thread(handler, thread_sensitive=False):
+    """Синхронный обработчик метода CBV как корутина.
+
+    Ответ рендерится в том же потоке, а не в цикле событий.
+    """
+    def run(self, request, *args, **kwargs):
+        response = handler(self, request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+
+    if not thread_sensitive:
+        run = pooled(run)
+
+    async def async_handler(self, request, *args, **kwargs):
+        return await sync_to_async(run, thread_sensitive=thread_sensitive)(
+            self, request, *args, **kwargs
+        )
+
+    return async_handler
+
+
+class AsyncView(generic.View):
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        checks_access = issubclass(cls, AccessMixin)
+
+        async def async_view(request, *args, **kwargs):
+            if checks_access:
+                await sync_to_async(pooled(load_user), thread_sensitive=False)(
+                    request
+                )
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        return update_wrapper(async_view, view)
@@ -0,0 +1,98 @@
+"""Чтение с реплик, запись в основную базу.
+
+Модели приложений из DATABASE_REPLICA_APPS читаются с одной из баз
+DATABASE_REPLICAS, всё остальное (сессии, пользователи, админка)
+и любые записи идут в default. Реплика может отставать, поэтому после
+своей записи пользователь REPLICA_PIN_SECONDS читает с основной базы:
+PrimaryPinMiddleware ставит cookie на ответ к POST и по нему
+закрепляет запросы за default. Признак живёт в contextvar и виден
+роутеру только на время запроса, в том числе в sync_to_async
+асинхронных представлений. Команды управления, которые пишут в базу,
+закрепляются за default так же: handle декорирован pin_to_primary().
+"""
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+@contextmanager
+def pin_to_primary():
+    """Читать с основной базы внутри блока или вызова функции."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _pinned.get()
+            or model._meta.app_label not in settings.DATABASE_REPLICA_APPS
+        ):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """На всех базах одни и те же данные."""
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Реплики получают схему вместе с данными от основной базы."""
+        return db not in settings.DATABASE_REPLICAS
+
+
+class PrimaryPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        writes = request.method not in SAFE_METHODS
+        token = _pinned.set(writes or PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.pin(response, writes)
+
+    async def __acall__(self, request):
+        writes = request.method not in SAFE_METHODS
+        token = _pinned.set(writes or PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.pin(response, writes)
+
+    def pin(self, response, writes):
+        if writes and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -21,6 +21,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.metrics.RequestMetricsMiddleware',
+    'yanews.routers.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -30,11 +32,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Под ASGI: 'yanews.async_urls' — асинхронные страницы чтения.
 ROOT_URLCONF = 'yanews.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yanews.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -51,13 +54,53 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# Прагмы SQLite для нескольких воркеров, см. yanews/sqlite.py.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,  # в КиБ, 20 МиБ на соединение
+    'mmap_size': 268435456,  # 256 МиБ
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения — алиасы из DATABASES. Локально реплику
+# можно сделать копией основной базы (manage.py sync_replicas):
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': BASE_DIR / 'replica.sqlite3',
+#     'PRAGMAS': SQLITE_PRAGMAS,
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+
+# Приложения, модели которых читаются с реплик.
+DATABASE_REPLICA_APPS = ('news',)
+
+# Сколько секунд после своей записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS = 10
+
+DATABASE_ROUTERS = ['yanews.routers.ReplicaRouter']
+
+# Для нескольких процессов подойдёт общий бэкенд, например файловый:
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+# 'LOCATION': BASE_DIR / 'cache',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +123,39 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_PER_PAGE = 50
+
+NEWS_SEARCH_PER_PAGE = 20
+
+NEWS_FEED_SIZE = 20
+
+# Файл с дополнительными запрещёнными словами, по одному в строке.
+BAD_WORDS_FILE = None
+
+# Как часто процесс проверяет, не изменился ли список запрещённых слов.
+BANNED_WORDS_CHECK_INTERVAL = 5
+
+NEWS_CACHE_ALIAS = 'default'
+
+NEWS_CACHE_TIMEOUT = 300
+
+NEWS_CACHE_LOCK_TIMEOUT = 5
+
+# Бюджеты на один запрос по имени URL: queries, db_ms, template_ms, wall_ms.
+REQUEST_BUDGETS = {
+    'news:home': {'queries': 3},
+    'news:search': {'queries': 5},
+    # Валидаторы лент и, на промахе кэша, сами новости.
+    'news:feed_rss': {'queries': 2},
+    'news:feed_atom': {'queries': 2},
+    'news:feed_json': {'queries': 2},
+    # Ещё два запроса в news:detail и news:edit может дать проверка
+    # версии и перезагрузка списка запрещённых слов. Создание и удаление
+    # сдвигают News.thread_updated_at в UPDATE счётчика, правка — сигналом.
+    'news:detail': {'queries': 8},
+    'news:edit': {'queries': 7},
+    'news:delete': {'queries': 7},
+}
+
+REQUEST_BUDGETS_STRICT = False
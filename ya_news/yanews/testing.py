@@ -0,0 +1,167 @@
+"""Быстрый старт тестовой базы и запуск тестов частями.
+
+Вместо миграций в начале каждой сессии тестовая база в памяти
+заполняется через ``backup()`` из снимка — файла SQLite с уже
+применёнными миграциями. Имя снимка содержит хэш файлов миграций всех
+установленных приложений и версии Django, поэтому изменённые миграции
+приводят к новому снимку, а не к устаревшей схеме. Снимки лежат
+в ``TEST_DB_CACHE`` (по умолчанию во временном каталоге системы),
+при построении нового снимка старые снимки того же проекта удаляются;
+``--create-db`` строит снимок заново.
+
+Фикстура django_db_setup заменяет одноимённую из pytest-django целиком:
+``--reuse-db`` и ``--nomigrations`` ни на что не влияют (снимок и так
+переиспользуется и содержит миграции), а настройки
+``DATABASES['default']['TEST']`` не применяются — тестовая база всегда
+общая база SQLite в памяти с именем из TEST_DB_NAME.
+
+Опция ``--shard=i/n`` оставляет процессу i-ю из n частей тестов. Тесты
+одного класса попадают в одну часть, чтобы setUpTestData выполнялся
+один раз, а части выравниваются по числу тестов.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+
+CACHE_ENV = 'TEST_DB_CACHE'
+
+# База в памяти, общая для всех соединений процесса, в том числе
+# из других потоков: так же её называет и сам бэкенд SQLite.
+TEST_DB_NAME = 'file:memorydb_default?mode=memory&cache=shared'
+
+
+def migrations_hash():
+    """Хэш версии Django, списка приложений и их миграций."""
+    import django
+    from django.apps import apps
+
+    digest = hashlib.sha256(django.get_version().encode())
+    for app_config in apps.get_app_configs():
+        digest.update(app_config.name.encode())
+        for path in sorted(Path(app_config.path).glob('migrations/*.py')):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def snapshot_path():
+    directory = Path(os.environ.get(CACHE_ENV) or tempfile.gettempdir())
+    return directory / f'{__package__}-{migrations_hash()}.sqlite3'
+
+
+def prune_snapshots(path):
+    """Удаляет снимки проекта для прежних миграций, кроме path."""
+    for old in path.parent.glob(f'{__package__}-*.sqlite3'):
+        if old != path:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def build_snapshot(path):
+    """Мигрирует пустую базу и атомарно кладёт её в path.
+
+    Снимок строится без прагм: в режиме WAL часть данных осталась бы
+    в файле -wal рядом со снимком.
+    """
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, building = tempfile.mkstemp(suffix='.sqlite3', dir=path.parent)
+    os.close(handle)
+    database = settings.DATABASES['default']
+    saved = {key: database[key] for key in ('NAME', 'PRAGMAS')}
+    database.update(NAME=building, PRAGMAS={})
+    try:
+        call_command('migrate', verbosity=0)
+        connections['default'].close()
+        os.replace(building, path)
+        prune_snapshots(path)
+    finally:
+        database.update(saved)
+        if os.path.exists(building):
+            os.remove(building)
+
+
+def ensure_snapshot(rebuild=False):
+    """Путь к снимку для текущих миграций, при необходимости строит его."""
+    path = snapshot_path()
+    if rebuild or not path.exists():
+        build_snapshot(path)
+    return path
+
+
+def open_snapshot(rebuild=False):
+    """Соединение только для чтения со снимком.
+
+    Параллельный запуск с другими миграциями может удалить снимок
+    между проверкой и открытием; тогда он строится ещё раз.
+    """
+    for attempt in range(2):
+        path = ensure_snapshot(rebuild or attempt > 0)
+        try:
+            return sqlite3.connect(f'{path.as_uri()}?mode=ro', uri=True)
+        except sqlite3.OperationalError:
+            if attempt:
+                raise
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--shard', default=None, metavar='i/n',
+        help='Запустить только i-ю из n частей тестов (с нуля).',
+    )
+
+
+def split(items, shards):
+    """Части тестов: классы целиком, самые крупные группы — первыми."""
+    groups = {}
+    for item in items:
+        groups.setdefault(item.cls or item.nodeid, []).append(item)
+    parts = [[] for _ in range(shards)]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(parts, key=len).extend(group)
+    return parts
+
+
+def pytest_collection_modifyitems(config, items):
+    shard = config.getoption('shard')
+    if shard is None:
+        return
+    index, shards = map(int, shard.split('/'))
+    selected = set(split(items, shards)[index])
+    config.hook.pytest_deselected(
+        items=[item for item in items if item not in selected]
+    )
+    items[:] = [item for item in items if item in selected]
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(request, django_test_environment, django_db_blocker):
+    """Тестовая база в памяти — копия снимка с миграциями.
+
+    Заменяет django_db_setup из pytest-django, см. описание модуля.
+    """
+    from django.db import connections
+
+    connection = connections['default']
+    with django_db_blocker.unblock():
+        source = open_snapshot(request.config.getoption('create_db'))
+        name = connection.settings_dict['NAME']
+        connection.settings_dict['NAME'] = TEST_DB_NAME
+        try:
+            connection.ensure_connection()
+            source.backup(connection.connection)
+        finally:
+            source.close()
+    yield
+    with django_db_blocker.unblock():
+        connection.close()
+    connection.settings_dict['NAME'] = name
@@ -0,0 +1,16 @@
+"""URL заметок с асинхронными страницами чтения."""
+from django.urls import path
+
+from notes import async_views, urls
+
+app_name = urls.app_name
+
+urlpatterns = [
+    path('notes/', async_views.NotesList.as_view(), name='list'),
+    path(
+        'note/<slug:slug>/', async_views.NoteDetail.as_view(), name='detail'
+    ),
+] + [
+    pattern for pattern in urls.urlpatterns
+    if pattern.name not in ('list', 'detail')
+]
@@ -0,0 +1,19 @@
+"""Асинхронные страницы чтения заметок для ASGI.
+
+Подключаются через notes.async_urls. Логика и шаблоны те же, что
+в views.py: проверка входа идёт в цикле событий, а выборка, пагинация
+и расчёт ETag — в пуле потоков.
+"""
+from yanote.asyncviews import AsyncView, in_thread
+
+from . import views
+
+
+class NotesList(AsyncView, views.NotesList):
+    """Список всех заметок пользователя."""
+    get = in_thread(views.NotesList.get)
+
+
+class NoteDetail(AsyncView, views.NoteDetail):
+    """Заметка подробно."""
+    get = in_thread(views.NoteDetail.get)
@@ -0,0 +1,225 @@
+"""Импорт и экспорт заметок пачками.
+
+Строки читаются потоком из NDJSON (один JSON-объект на строку) или CSV
+с заголовком title,text,slug и проверяются полями NoteForm.
+Уникальность slug проверяется не запросом на строку, а сразу для всей
+пачки; свободные slug для строк без него подбираются так же.
+Каждая пачка вставляется bulk_create в своей транзакции: ошибки
+в строках не откатывают уже импортированные пачки. Строки не в UTF-8
+и не разобранные JSON отклоняются по одной, а CSV после такой ошибки
+дальше не читается: неясно, где кончается повреждённая запись.
+
+Экспорт читает заметки через iterator() и отдаёт их кусками,
+так что в памяти не бывает больше EXPORT_CHUNK_SIZE заметок.
+"""
+import csv
+import json
+from collections import namedtuple
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, router
+
+from .forms import WARNING, NoteForm
+from .models import Note
+from .slugs import ATTEMPTS, free_slugs, slugify
+from .transactions import atomic_write
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+FIELDS = ('title', 'text', 'slug')
+
+CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+
+# Сколько ошибок сохранять для отчёта; остальные только считаются.
+MAX_ERRORS = 100
+
+RowError = namedtuple('RowError', 'line errors')
+
+NOT_PARSED = 'Строка не разобрана.'
+NOT_UTF8 = 'Строка не в кодировке UTF-8.'
+CSV_STOPPED = ' Остаток файла не импортирован.'
+NOT_STRING = 'Ожидается строка.'
+
+
+class ImportResult:
+    """Итог импорта: сколько заметок создано и какие строки отвергнуты."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def reject(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(RowError(line, errors))
+
+
+def read_csv(stream):
+    lines = (raw.decode('utf-8-sig') for raw in stream)
+    reader = csv.DictReader(lines)
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except UnicodeDecodeError:
+        yield reader.line_num + 1, NOT_UTF8 + CSV_STOPPED
+    except csv.Error as error:
+        yield reader.line_num, f'Ошибка CSV: {error}.' + CSV_STOPPED
+
+
+def read_rows(stream, file_format):
+    """Пары (номер строки, данные) из бинарного потока.
+
+    Для строки, которую не удалось прочитать, вместо данных — текст
+    ошибки.
+    """
+    if file_format == 'csv':
+        yield from read_csv(stream)
+        return
+    for line, raw in enumerate(stream, start=1):
+        try:
+            raw = raw.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            yield line, NOT_UTF8
+            continue
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else NOT_PARSED
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def validate(rows):
+    """Заметки из строк, прошедших проверку полей NoteForm, и ошибки.
+
+    Поля проверяются напрямую: экземпляр формы на строку копирует
+    все поля и обходится дороже самой вставки. Уникальность slug
+    проверит allocate_slugs.
+    """
+    fields = NoteForm.base_fields
+    notes, rejected = [], []
+    for line, row in rows:
+        if isinstance(row, str):
+            rejected.append(RowError(line, {'__all__': [row]}))
+            continue
+        cleaned, errors = {}, {}
+        for name, field in fields.items():
+            value = row.get(name) or ''
+            if not isinstance(value, str):
+                # Иначе список стал бы заголовком «['a']».
+                errors[name] = [NOT_STRING]
+                continue
+            try:
+                cleaned[name] = field.clean(value)
+            except ValidationError as error:
+                errors[name] = error.messages
+        if errors:
+            rejected.append(RowError(line, errors))
+            continue
+        notes.append((line, Note(**cleaned)))
+    return notes, rejected
+
+
+def allocate_slugs(notes, using):
+    """Проверяет заданные slug и подбирает остальные сразу для пачки.
+
+    Возвращает принятые заметки и строки с занятым slug.
+    """
+    queryset = Note.objects.using(using)
+    explicit = [note.slug for _, note in notes if note.slug]
+    taken = set(
+        queryset.filter(slug__in=explicit).values_list('slug', flat=True)
+    )
+    accepted, automatic, rejected = [], [], []
+    for line, note in notes:
+        if not note.slug:
+            automatic.append(note)
+        elif note.slug in taken:
+            rejected.append(RowError(line, {'slug': [note.slug + WARNING]}))
+            continue
+        else:
+            taken.add(note.slug)
+        accepted.append(note)
+    slugs = free_slugs(
+        queryset,
+        [slugify(note.title) for note in automatic],
+        Note._meta.get_field('slug').max_length,
+        reserved=taken,
+    )
+    for note, slug in zip(automatic, slugs):
+        note.slug = slug
+    return accepted, rejected
+
+
+def import_chunk(rows, author, result):
+    """Занятые slug читаются из базы для записи, не с реплики."""
+    notes, invalid = validate(rows)
+    slugs = [note.slug for _, note in notes]
+    using = router.db_for_write(Note)
+    for attempt in range(ATTEMPTS):
+        try:
+            with atomic_write(using):
+                accepted, rejected = allocate_slugs(notes, using)
+                for note in accepted:
+                    note.author = author
+                Note.objects.using(using).bulk_create(accepted)
+            break
+        except IntegrityError:
+            # Параллельный запрос занял slug: подбираем заново.
+            if attempt == ATTEMPTS - 1:
+                raise
+            for (_, note), slug in zip(notes, slugs):
+                note.slug = slug
+    result.created += len(accepted)
+    for error in sorted(invalid + rejected):
+        result.reject(*error)
+
+
+def import_notes(stream, file_format, author, chunk_size=CHUNK_SIZE):
+    """Импортирует заметки автора из потока; возвращает ImportResult."""
+    result = ImportResult()
+    for rows in chunks(read_rows(stream, file_format), chunk_size):
+        import_chunk(rows, author, result)
+    return result
+
+
+class Echo:
+    """Буфер для csv.writer: writerow просто возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_notes(queryset, file_format):
+    """Заметки queryset кусками NDJSON или CSV для StreamingHttpResponse."""
+    notes = queryset.only(*FIELDS).order_by('id').iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+
+        def render(note):
+            return writer.writerow([getattr(note, f) for f in FIELDS])
+    else:
+        def render(note):
+            return json.dumps(
+                {field: getattr(note, field) for field in FIELDS},
+                ensure_ascii=False,
+            ) + '\n'
+    for chunk in chunks(notes, EXPORT_CHUNK_SIZE):
+        yield ''.join(map(render, chunk))
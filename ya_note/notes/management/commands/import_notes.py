@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import CHUNK_SIZE, CONTENT_TYPES, import_notes
+from yanote.routers import pin_to_primary
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки автора из файла NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--author', required=True)
+        parser.add_argument(
+            '--format', choices=tuple(CONTENT_TYPES),
+            help='По умолчанию — по расширению файла.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    @pin_to_primary()
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get(
+                username=options['author']
+            )
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["author"]}.')
+        file_format = options['format'] or (
+            'csv' if options['path'].endswith('.csv') else 'ndjson'
+        )
+        with open(options['path'], 'rb') as stream:
+            result = import_notes(
+                stream, file_format, author, chunk_size=options['chunk_size']
+            )
+        for error in result.errors:
+            self.stderr.write(f'Строка {error.line}: {error.errors}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано заметок: {result.created}, '
+            f'отклонено строк: {result.failed}.'
+        ))
@@ -0,0 +1,170 @@
+import random
+import re
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.db.models import Max
+
+from notes.models import Note
+from notes.slugs import free_slugs, slugify
+from notes.transactions import atomic_write
+from yanote.routers import pin_to_primary
+
+User = get_user_model()
+
+WORDS = (
+    'список покупок план работы идеи подарки книги фильмы рецепт борщ '
+    'пельмени пирог встреча созвон отчёт квартал бюджет отпуск поездка '
+    'билеты гостиница дача ремонт кухня балкон машина шиномонтаж врач '
+    'анализы спорт тренировка бег йога английский язык курс экзамен '
+    'дедлайн задача проект релиз ошибка сервер объявление подъезд щенок '
+    'ёлка праздник юбилей съезд семья дети школа кружок музыка цветы '
+    'сад огород урожай варенье пароли заметки мысли цитаты'
+).split()
+
+# Заголовки, которые пишут многие: на них работают суффиксы -2, -3...
+COMMON_TITLES = (
+    'Список покупок', 'План на неделю', 'Идеи подарков', 'Рецепт борща',
+    'Книги на лето', 'Фильмы посмотреть', 'Дела на завтра', 'Пароли',
+    'Отпуск', 'Ремонт на кухне', 'Тренировки', 'Английский язык',
+)
+COMMON_SHARE = 0.01
+
+
+def zipf_weights(size, skew):
+    return [1 / rank ** skew for rank in range(1, size + 1)]
+
+
+def note_counts(rng, users_count, total, skew):
+    """Число заметок у каждого пользователя: немногие пишут много.
+
+    Доли распределены по закону Ципфа, самые активные выбираются
+    случайно, а сумма точно равна total.
+    """
+    weights = zipf_weights(users_count, skew)
+    rng.shuffle(weights)
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.sample(range(users_count), total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+def title(rng, max_length):
+    if rng.random() < COMMON_SHARE:
+        return rng.choice(COMMON_TITLES)
+    text = ' '.join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize()
+    return text[:max_length]
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями и заметками '
+        'с русскими заголовками. При одном --seed данные одинаковы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--notes', type=int, default=100000)
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Показатель Ципфа для заметок по авторам.',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='seed', help='Начало имён пользователей.'
+        )
+        parser.add_argument(
+            '--password', default='password',
+            help='Общий пароль: хэшируется один раз для всех.',
+        )
+
+    @pin_to_primary()
+    def handle(self, *args, **options):
+        if User.objects.filter(
+            username__regex=rf'^{re.escape(options["prefix"])}\d+$'
+        ).exists():
+            raise CommandError(
+                f'Пользователи {options["prefix"]}N уже есть, '
+                'укажите другой --prefix.'
+            )
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.started = time.perf_counter()
+
+        password = make_password(options['password'])
+        users = self.seed_users(
+            options['prefix'], options['users'], password
+        )
+        counts = note_counts(
+            rng, len(users), options['notes'], options['skew']
+        )
+        self.seed_notes(rng, zip(users, counts), options['notes'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - self.started:.0f} с.'
+        ))
+
+    def progress(self, label, done, total):
+        self.stdout.write(
+            f'{label}: {done}/{total} '
+            f'({time.perf_counter() - self.started:.0f} с)'
+        )
+
+    def seed_users(self, prefix, count, password):
+        """bulk_create в SQLite не возвращает pk: читаем их заново."""
+        start = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        for offset in range(0, count, self.batch_size):
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    User(username=f'{prefix}{number}', password=password)
+                    for number in range(
+                        offset, min(offset + self.batch_size, count)
+                    )
+                )
+        self.progress('Пользователи', count, count)
+        return list(
+            User.objects.filter(pk__gt=start).order_by('pk').values_list(
+                'pk', flat=True
+            )[:count]
+        )
+
+    def insert(self, notes):
+        """Пачка заметок со свободными slug из заголовков."""
+        using = router.db_for_write(Note)
+        slugs = free_slugs(
+            Note.objects.using(using),
+            [slugify(note.title) for note in notes],
+            self.slug_length,
+        )
+        for note, slug in zip(notes, slugs):
+            note.slug = slug
+        with atomic_write(using):
+            Note.objects.using(using).bulk_create(notes)
+
+    def seed_notes(self, rng, authors, total):
+        self.slug_length = Note._meta.get_field('slug').max_length
+        max_length = Note._meta.get_field('title').max_length
+        batch, done = [], 0
+        for author_id, count in authors:
+            for _ in range(count):
+                batch.append(Note(
+                    title=title(rng, max_length),
+                    text=' '.join(rng.choices(WORDS, k=rng.randint(10, 80))),
+                    author_id=author_id,
+                ))
+                if len(batch) == self.batch_size:
+                    self.insert(batch)
+                    done += len(batch)
+                    batch = []
+                    if self.verbosity > 1:
+                        self.progress('Заметки', done, total)
+        if batch:
+            self.insert(batch)
+        self.progress('Заметки', total, total)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики из DATABASE_REPLICAS. '
+        'Нужна для локальной проверки чтения с реплик.'
+    )
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        for alias in settings.DATABASE_REPLICAS:
+            target = connections[alias]
+            if {source.vendor, target.vendor} != {'sqlite'}:
+                raise CommandError(
+                    'Копировать можно только базы SQLite, '
+                    'остальные реплицирует сам сервер БД.'
+                )
+            source.ensure_connection()
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            self.stdout.write(
+                self.style.SUCCESS(f'Реплика {alias} обновлена.')
+            )
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:56
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module('notes.migrations.0003_note_search_index')
+
+DROP_TRIGGERS = search_index.DROP_INDEX[:-1]
+
+
+def recreate_triggers(apps, schema_editor):
+    """SQLite пересоздаёт notes_note при AddField, триггеры FTS теряются."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_TRIGGERS + search_index.TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_search_index'),
+    ]
+
+    operations = [
+        # При откате RemoveField тоже пересоздаёт таблицу.
+        migrations.RunPython(migrations.RunPython.noop, recreate_triggers),
+        migrations.AddField(
+            model_name='note',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменена'),
+        ),
+        migrations.RunPython(recreate_triggers, migrations.RunPython.noop),
+    ]
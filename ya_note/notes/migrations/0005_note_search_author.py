@@ -0,0 +1,64 @@
+from importlib import import_module
+
+from django.db import migrations
+
+search_index = import_module('notes.migrations.0003_note_search_index')
+
+# Автор — ещё одна колонка индекса: поиск фильтрует по ней внутри
+# MATCH и не ранжирует совпадения из чужих заметок. Триггеры
+# следят и за сменой автора.
+TRIGGERS = (
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        ) VALUES ('delete', old.id, old.title, old.text, old.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text, author_id
+    ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        ) VALUES ('delete', old.id, old.title, old.text, old.author_id);
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+)
+
+CREATE_INDEX = (
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, author_id,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    *TRIGGERS,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index.run_on_sqlite(
+                search_index.DROP_INDEX + CREATE_INDEX
+            ),
+            search_index.run_on_sqlite(
+                search_index.DROP_INDEX + search_index.CREATE_INDEX
+            ),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, router
 
-from pytils.translit import slugify
+from .slugs import save_with_free_slug, slugify
 
 
 class Note(models.Model):
@@ -27,12 +27,24 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Без slug подбираем свободный из заголовка: title, title-2..."""
+        if self.slug:
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        save = super().save
+        return save_with_free_slug(
+            self, slugify(self.title), lambda: save(*args, **kwargs), using
+        )
@@ -0,0 +1,80 @@
+"""Полнотекстовый поиск по заметкам.
+
+На SQLite запрос идёт в индекс FTS5 notes_note_fts (см. миграции
+0003_note_search_index и 0005_note_search_author): совпадения
+ранжируются по bm25, заголовок весит больше текста, а фрагмент
+с подсветкой строит snippet(). Автор — тоже колонка индекса, и фильтр
+по нему входит в сам MATCH: чужие заметки не ранжируются и не
+читаются из notes_note. Списки документов по словам при этом общие
+для всех авторов, так что частое слово всё равно обходится целиком:
+на 200 тыс. заметок это десятки миллисекунд (benchmarks.notes_search).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+TOKEN = re.compile(r'\w+')
+
+# Служебные символы вместо тегов: текст заметки сначала экранируется,
+# и только потом они заменяются на <mark>.
+MARK_START, MARK_END = '\x02', '\x03'
+
+SEARCH_SQL = '''
+    SELECT note.id, note.title, note.slug,
+           snippet(notes_note_fts, -1, %s, %s, '…', 12) AS snippet
+    FROM notes_note_fts
+    JOIN notes_note AS note ON note.id = notes_note_fts.rowid
+    WHERE notes_note_fts MATCH %s
+    ORDER BY bm25(notes_note_fts, 5.0, 1.0, 0.0)
+    LIMIT %s
+'''
+
+
+def match_expression(query):
+    """Все слова запроса, каждое — как префикс."""
+    return ' '.join(f'"{token}"*' for token in TOKEN.findall(query))
+
+
+def author_match(author, expression):
+    """Слова ищутся в заголовке и тексте, но только у автора."""
+    return f'author_id : "{author.pk}" AND {{title text}} : ({expression})'
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search_notes(author, query, limit):
+    """Заметки автора, подходящие под запрос, от лучших к худшим."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+    if connection.vendor != 'sqlite':
+        return list(Note.objects.filter(
+            Q(title__icontains=query) | Q(text__icontains=query),
+            author=author,
+        ).only('title', 'slug')[:limit])
+    notes = list(Note.objects.raw(
+        SEARCH_SQL,
+        [MARK_START, MARK_END, author_match(author, expression), limit],
+    ))
+    for note in notes:
+        note.snippet = highlight(note.snippet)
+    return notes
+
+
+def rebuild_index():
+    """Перестраивает индекс целиком по таблице заметок."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')"
+        )
@@ -0,0 +1,150 @@
+"""Подбор уникального slug заметки.
+
+Вместо «проверить, потом вставить» занятые варианты base, base-2,
+base-3... читаются запросами slug IN (...) по уникальному индексу:
+сначала base и первые WINDOW номеров, а если все они заняты — окно
+вдвое больше, и так далее. Остальные slug с тем же началом, вроде
+base-otchet, не читаются. Заметка сохраняется с первым свободным
+вариантом (при импорте — сразу для пачки заметок, см. free_slugs).
+Если параллельный запрос успел занять тот же slug, вставка падает
+на ограничении unique и повторяется с новым подбором, но не больше
+ATTEMPTS раз.
+
+Транслитерация pytils медленная, а заголовки часто повторяются
+(особенно при импорте), поэтому slugify кэширует результаты
+в ограниченном LRU-кэше; счётчики — slugify.cache_info().
+"""
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+
+from django.db import IntegrityError
+from pytils.translit import slugify as translit_slugify
+
+from .transactions import atomic_write
+
+ATTEMPTS = 10
+
+# Место под суффикс «-N», если base занимает всю длину поля.
+SUFFIX_LENGTH = 8
+
+FALLBACK_SLUG = 'note'
+
+SLUGIFY_CACHE_SIZE = 4096
+
+# Сколько номеров base-N проверяется в первом окне.
+WINDOW = 16
+
+# Значений в одном IN: SQLite ограничивает число параметров запроса.
+SLUGS_PER_QUERY = 500
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def slugify(title):
+    """pytils.translit.slugify с кэшем по заголовку."""
+    return translit_slugify(title)
+
+
+def numbered(base, max_length, start, stop):
+    """Варианты base-start ... base-(stop - 1)."""
+    stem = base[:max_length - SUFFIX_LENGTH]
+    return [f'{stem}-{number}' for number in range(start, stop)]
+
+
+def taken_slugs(queryset, slugs):
+    """Какие из slugs уже заняты."""
+    slugs = list(slugs)
+    taken = set()
+    for start in range(0, len(slugs), SLUGS_PER_QUERY):
+        taken.update(queryset.filter(
+            slug__in=slugs[start:start + SLUGS_PER_QUERY]
+        ).values_list('slug', flat=True))
+    return taken
+
+
+def free_numbered(queryset, needs, taken, max_length):
+    """Свободные base-N по возрастанию N: needs[base] штук для base.
+
+    Окна номеров всех base проверяются вместе; окно base, которому
+    не хватило свободных номеров, в следующем раунде вдвое больше.
+    Выданные slug добавляются в taken.
+    """
+    free = {base: [] for base in needs}
+    next_number = dict.fromkeys(needs, 2)
+    window = dict.fromkeys(needs, WINDOW)
+    pending = sorted(base for base, count in needs.items() if count)
+    while pending:
+        candidates = {}
+        for base in pending:
+            size = max(window[base], needs[base] - len(free[base]))
+            candidates[base] = numbered(
+                base, max_length, next_number[base], next_number[base] + size
+            )
+            next_number[base] += size
+            window[base] *= 2
+        taken.update(taken_slugs(queryset, chain(*candidates.values())))
+        for base, slugs in candidates.items():
+            for slug in slugs:
+                if len(free[base]) == needs[base]:
+                    break
+                if slug not in taken:
+                    taken.add(slug)
+                    free[base].append(slug)
+        pending = [base for base in pending if len(free[base]) < needs[base]]
+    return free
+
+
+def free_slug(queryset, base, max_length):
+    """Первый свободный из base, base-2, base-3..."""
+    base = base[:max_length] or FALLBACK_SLUG
+    taken = taken_slugs(
+        queryset, [base] + numbered(base, max_length, 2, 2 + WINDOW)
+    )
+    if base not in taken:
+        return base
+    for slug in numbered(base, max_length, 2, 2 + WINDOW):
+        if slug not in taken:
+            return slug
+    return free_numbered(queryset, {base: 1}, taken, max_length)[base][0]
+
+
+def free_slugs(queryset, bases, max_length, reserved=()):
+    """Свободные slug для списка base.
+
+    Повторяющиеся base получают base-2, base-3... по порядку;
+    slug из reserved считаются занятыми. Сначала одним запросом
+    проверяются сами base, а варианты base-N читаются только для
+    занятых или повторяющихся, см. free_numbered.
+    """
+    bases = [base[:max_length] or FALLBACK_SLUG for base in bases]
+    taken = set(reserved) | taken_slugs(queryset, set(bases))
+    queues, needs = {}, {}
+    for base, count in sorted(Counter(bases).items()):
+        queues[base] = []
+        if base not in taken:
+            taken.add(base)
+            queues[base].append(base)
+            count -= 1
+        needs[base] = count
+    for base, slugs in free_numbered(
+        queryset, needs, taken, max_length
+    ).items():
+        queues[base] += slugs
+    queues = {base: iter(slugs) for base, slugs in queues.items()}
+    return [next(queues[base]) for base in bases]
+
+
+def save_with_free_slug(note, base, save, using):
+    """Сохраняет заметку, подобрав свободный slug из base."""
+    max_length = note._meta.get_field('slug').max_length
+    queryset = type(note)._default_manager.using(using)
+    if note.pk is not None:
+        queryset = queryset.exclude(pk=note.pk)
+    for attempt in range(ATTEMPTS):
+        note.slug = free_slug(queryset, base, max_length)
+        try:
+            with atomic_write(using):
+                return save()
+        except IntegrityError:
+            if attempt == ATTEMPTS - 1:
+                raise
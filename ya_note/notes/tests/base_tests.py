@@ -1,11 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from notes.models import Note
 
 User = get_user_model()
 
 
+@override_settings(REQUEST_BUDGETS_STRICT=True)
 class BaseTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -54,11 +55,16 @@ class BaseTest(TestCase):
         # Реверсы
         cls.HOME_URL = reverse('notes:home')
         cls.LIST_URL = reverse('notes:list')
+        cls.LIST_JSON_URL = reverse('notes:list_json')
+        cls.SEARCH_URL = reverse('notes:search')
+        cls.IMPORT_URL = reverse('notes:import')
+        cls.EXPORT_URL = reverse('notes:export')
         cls.SUCCESS_URL = reverse('notes:success')
         cls.ADD_URL = reverse('notes:add')
         cls.LOGIN_URL = reverse('users:login')
         cls.LOGOUT_URL = reverse('users:logout')
         cls.SIGNUP_URL = reverse('users:signup')
+        cls.METRICS_URL = reverse('metrics')
 
         # Динамические реверсы
         cls.DETAIL_URL = reverse('notes:detail', args=[cls.SLUG])
@@ -1,5 +1,8 @@
 from .base_tests import BaseTest
+from http import HTTPStatus
+from django.test import override_settings
 from notes.forms import NoteForm
+from notes.models import Note
 
 
 class ContentTests(BaseTest):
@@ -23,3 +26,132 @@ class ContentTests(BaseTest):
         edit_response = self.author_client.get(self.EDIT_URL)
         self.assertIn('form', edit_response.context)
         self.assertIsInstance(edit_response.context['form'], NoteForm)
+
+
+@override_settings(NOTES_PER_PAGE=2)
+class NotesListPaginationTests(BaseTest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text=cls.TEXT,
+                slug=f'note-{index}',
+                author=cls.author,
+            )
+            for index in range(4)
+        )
+
+    def test_list_is_paginated(self):
+        pages = [
+            self.author_client.get(self.LIST_URL, {'page': page})
+            for page in (1, 2, 3)
+        ]
+        titles = [
+            note.title
+            for response in pages
+            for note in response.context['object_list']
+        ]
+        self.assertEqual(len(pages[0].context['object_list']), 2)
+        self.assertEqual(len(titles), 5)
+        self.assertEqual(len(set(titles)), 5)
+
+    def test_list_does_not_load_text(self):
+        response = self.author_client.get(self.LIST_URL)
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+    def test_list_json(self):
+        data = self.author_client.get(
+            self.LIST_JSON_URL, {'page': 3}
+        ).json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(data['num_pages'], 3)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['previous'], 2)
+        self.assertEqual(data['results'][0]['slug'], 'note-3')
+
+
+class NoteSearchTests(BaseTest):
+    def search(self, query):
+        response = self.author_client.get(self.SEARCH_URL, {'q': query})
+        return list(response.context['object_list'])
+
+    def test_search_finds_only_own_notes(self):
+        self.assertEqual(self.search('заметки'), [self.note])
+
+    def test_search_by_word_prefix(self):
+        self.assertEqual(self.search('Тестов'), [self.note])
+
+    def test_title_match_ranks_first(self):
+        title_match = Note.objects.create(
+            title='Покупки', text=self.TEXT, author=self.author
+        )
+        Note.objects.create(
+            title='Разное', text='Нужно сделать покупки', author=self.author
+        )
+        self.assertEqual(self.search('покупки')[0], title_match)
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        Note.objects.create(
+            title='Разметка', text='<b>жирный</b> текст', author=self.author
+        )
+        note, = self.search('жирный')
+        self.assertEqual(
+            note.snippet, '&lt;b&gt;<mark>жирный</mark>&lt;/b&gt; текст'
+        )
+
+    def test_index_follows_edits(self):
+        self.note.text = 'Совсем другое'
+        self.note.save()
+        self.assertEqual(self.search('заметки'), [])
+        self.assertEqual(self.search('другое'), [self.note])
+
+    def test_index_follows_author_change(self):
+        self.other_note.author = self.author
+        self.other_note.save()
+        self.assertEqual(
+            set(self.search('заметки')), {self.note, self.other_note}
+        )
+
+    def test_author_id_in_text_is_not_a_filter(self):
+        Note.objects.create(
+            title='Номер', text=f'Код {self.author.pk}', author=self.other_user
+        )
+        self.assertEqual(self.search(str(self.author.pk)), [])
+
+    def test_empty_query(self):
+        self.assertEqual(self.search(' !? '), [])
+
+
+class NoteDetailConditionalTests(BaseTest):
+    def test_unchanged_note_is_not_modified(self):
+        response = self.author_client.get(self.DETAIL_URL)
+        for header, value in (
+            ('HTTP_IF_NONE_MATCH', response['ETag']),
+            ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+        ):
+            with self.subTest(header=header), self.assertNumQueries(3):
+                response = self.author_client.get(
+                    self.DETAIL_URL, **{header: value}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.templates, [])
+
+    def test_edited_note_is_rendered_again(self):
+        etag = self.author_client.get(self.DETAIL_URL)['ETag']
+        self.note.text = 'Новый текст'
+        self.note.save()
+        response = self.author_client.get(
+            self.DETAIL_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Новый текст')
+
+    def test_other_user_gets_not_found(self):
+        etag = self.author_client.get(self.DETAIL_URL)['ETag']
+        response = self.other_client.get(
+            self.DETAIL_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -1,7 +1,26 @@
-from .base_tests import BaseTest
-from notes.forms import NoteForm
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from asgiref.sync import sync_to_async
+from unittest import mock
+from .base_tests import BaseTest, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from notes import async_views
+from notes.bulk import NOT_STRING, NOT_UTF8, RowError, import_notes
+from notes.forms import WARNING, NoteForm
 from notes.models import Note
+from notes.slugs import SUFFIX_LENGTH, slugify as cached_slugify
 from pytils.translit import slugify
+from yanote.routers import PIN_COOKIE
 from http import HTTPStatus
 
 
@@ -93,3 +112,367 @@ class LogicTests(BaseTest):
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         # Проверяем, что заметка всё ещё существует в базе данных
         self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
+
+    def test_auto_slug_gets_free_suffix(self):
+        base = slugify(self.TITLE)
+        first = Note.objects.create(
+            title=self.TITLE, text=self.TEXT, author=self.author
+        )
+        response = self.author_client.post(
+            self.ADD_URL, data={'title': self.TITLE, 'text': self.TEXT}
+        )
+        self.assertRedirects(response, self.SUCCESS_URL)
+        self.assertEqual(first.slug, base)
+        self.assertTrue(Note.objects.filter(slug=f'{base}-2').exists())
+
+    def test_auto_slug_reads_only_numbered_variants(self):
+        base = slugify('Отпуск')
+        Note.objects.bulk_create(
+            Note(title='Отпуск', text=self.TEXT, author=self.author,
+                 slug=slug)
+            for slug in [base, f'{base}-plan', f'{base}-na-more'] + [
+                f'{base}-{number}' for number in range(2, 40)
+            ]
+        )
+        with CaptureQueriesContext(connections['default']) as context:
+            note = Note.objects.create(
+                title='Отпуск', text=self.TEXT, author=self.author
+            )
+        self.assertEqual(note.slug, f'{base}-40')
+        lookups = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT "notes_note"."slug"')
+        ]
+        self.assertTrue(lookups)
+        self.assertFalse(
+            any('"notes_note"."slug" >' in sql for sql in lookups),
+            'Читаются только варианты base-N, а не все slug с тем же началом.'
+        )
+
+    def test_auto_slug_of_max_length_title(self):
+        title = 'а' * 100
+        slugs = [
+            Note.objects.create(
+                title=title, text=self.TEXT, author=self.author
+            ).slug
+            for _ in range(3)
+        ]
+        base = slugify(title)[:100]
+        self.assertEqual(slugs[0], base)
+        self.assertEqual(slugs[2], base[:100 - SUFFIX_LENGTH] + '-3')
+        self.assertTrue(all(len(slug) <= 100 for slug in slugs))
+
+
+class SlugConcurrencyTests(TestCase):
+    """Одновременное создание заметок с одинаковым заголовком.
+
+    Потокам нужна общая база в файле, поэтому тест поднимает отдельную
+    базу SQLite в режиме WAL, а не использует тестовую в памяти.
+    """
+    ALIAS = 'slug_stress'
+    THREADS = 8
+    TITLE = 'Одинаковый заголовок'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.databases[self.ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'stress.sqlite3'),
+            'OPTIONS': {'timeout': 30},
+        }
+        self.addCleanup(connections.databases.pop, self.ALIAS)
+        self.addCleanup(connections[self.ALIAS].close)
+        call_command('migrate', database=self.ALIAS, verbosity=0)
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+        self.author = User.objects.db_manager(self.ALIAS).create_user(
+            username='author'
+        )
+
+    def create_note(self, barrier, errors):
+        try:
+            barrier.wait()
+            Note(
+                title=self.TITLE, text='Текст', author_id=self.author.pk
+            ).save(using=self.ALIAS)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections[self.ALIAS].close()
+
+    def test_concurrent_auto_slugs(self):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+        threads = [
+            threading.Thread(target=self.create_note, args=(barrier, errors))
+            for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        base = slugify(self.TITLE)
+        self.assertEqual(
+            set(Note.objects.using(self.ALIAS).values_list('slug', flat=True)),
+            {base} | {f'{base}-{n}' for n in range(2, self.THREADS + 1)}
+        )
+
+
+class SlugifyCacheTests(TestCase):
+    def test_slugify_cache(self):
+        cached_slugify.cache_clear()
+        for _ in range(3):
+            self.assertEqual(
+                cached_slugify('Список покупок'), slugify('Список покупок')
+            )
+        info = cached_slugify.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 1))
+
+
+class SqliteProfileTests(TestCase):
+    ALIAS = 'profile'
+
+    def test_pragmas_applied_to_new_connections(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.databases[self.ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'profile.sqlite3'),
+            'PRAGMAS': settings.SQLITE_PRAGMAS,
+        }
+        self.addCleanup(connections.databases.pop, self.ALIAS)
+        self.addCleanup(connections.__delitem__, self.ALIAS)
+        self.addCleanup(connections[self.ALIAS].close)
+        with connections[self.ALIAS].cursor() as cursor:
+            for pragma, value in (
+                ('journal_mode', 'wal'),
+                ('synchronous', 1),
+                ('busy_timeout', 5000),
+                ('cache_size', -20000),
+            ):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], value, pragma)
+
+
+class ReplicaRoutingTests(BaseTest):
+    """Чтение с реплики и закрепление за основной базой после записи.
+
+    Реплика — отдельный файл SQLite со схемой, но без заметок: по тому,
+    видны ли заметки, понятно, с какой базы читала страница.
+    """
+    ALIAS = 'replica'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.databases[self.ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+        }
+        self.addCleanup(connections.databases.pop, self.ALIAS)
+        self.addCleanup(connections.__delitem__, self.ALIAS)
+        self.addCleanup(connections[self.ALIAS].close)
+        call_command('migrate', database=self.ALIAS, verbosity=0)
+        replicas = override_settings(DATABASE_REPLICAS=[self.ALIAS])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+    def test_reads_go_to_replica(self):
+        response = self.author_client.get(self.LIST_URL)
+        self.assertEqual(list(response.context['object_list']), [])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_reads_stick_to_primary_after_write(self):
+        response = self.author_client.post(self.ADD_URL, data={
+            'title': 'Новая заметка', 'text': 'Текст', 'slug': 'new-note',
+        })
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(
+            Note.objects.using(self.ALIAS).filter(slug='new-note').exists()
+        )
+        response = self.author_client.get(self.LIST_URL)
+        self.assertEqual(
+            {note.slug for note in response.context['object_list']},
+            {self.SLUG, 'new-note'}
+        )
+
+    def test_import_command_checks_slugs_on_primary(self):
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as file:
+            file.write(json.dumps({
+                'title': self.TITLE, 'text': 'Текст', 'slug': self.SLUG,
+            }).encode() + b'\n' + json.dumps({
+                'title': self.TITLE, 'text': 'Текст',
+            }).encode())
+            file.flush()
+            call_command(
+                'import_notes', file.name, author=self.USERNAME_AUTHOR,
+                stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+        self.assertEqual(
+            set(Note.objects.using('default').filter(
+                author=self.author, title=self.TITLE
+            ).values_list('slug', flat=True)),
+            {self.SLUG, slugify(self.TITLE)},
+        )
+
+
+class NoteImportExportTests(BaseTest):
+    def ndjson(self, *rows):
+        return '\n'.join(
+            json.dumps(row, ensure_ascii=False) for row in rows
+        ).encode()
+
+    def test_import_allocates_slugs_in_batch(self):
+        result = import_notes(io.BytesIO(self.ndjson(
+            {'title': 'Покупки', 'text': 'Хлеб'},
+            {'title': 'Покупки', 'text': 'Молоко'},
+            {'title': 'Задачи', 'text': 'Позвонить', 'slug': 'tasks'},
+        )), 'ndjson', self.author, chunk_size=2)
+        self.assertEqual((result.created, result.failed), (3, 0))
+        base = slugify('Покупки')
+        self.assertEqual(
+            set(Note.objects.filter(
+                author=self.author, title__in=('Покупки', 'Задачи')
+            ).values_list('slug', flat=True)),
+            {base, f'{base}-2', 'tasks'}
+        )
+
+    def test_import_rejects_invalid_rows(self):
+        result = import_notes(io.BytesIO(self.ndjson(
+            {'title': 'Без текста'},
+            {'title': 'Чужой slug', 'text': 'Текст', 'slug': self.SLUG},
+            {'title': 'Повтор', 'text': 'Текст', 'slug': 'twice'},
+            {'title': 'Повтор', 'text': 'Текст', 'slug': 'twice'},
+        ) + b'\nnot json'), 'ndjson', self.author)
+        self.assertEqual((result.created, result.failed), (1, 4))
+        self.assertEqual(
+            [error.line for error in result.errors], [1, 2, 4, 5]
+        )
+        self.assertIn('text', result.errors[0].errors)
+        self.assertEqual(
+            result.errors[1].errors, {'slug': [self.SLUG + WARNING]}
+        )
+
+    def test_import_csv_upload(self):
+        upload = SimpleUploadedFile(
+            'notes.csv', 'title,text,slug\nИз CSV,Текст,\n'.encode()
+        )
+        response = self.author_client.post(
+            self.IMPORT_URL, {'file': upload, 'format': 'csv'}
+        )
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertTrue(Note.objects.filter(
+            author=self.author, slug=slugify('Из CSV')
+        ).exists())
+
+    def test_import_rejects_bad_bytes_and_non_strings(self):
+        result = import_notes(io.BytesIO(
+            self.ndjson({'title': 'Первая', 'text': 'Текст'})
+            + b'\n{"title": "\xff", "text": "x"}\n'
+            + self.ndjson({'title': ['a'], 'text': 'Текст'})
+        ), 'ndjson', self.author)
+        self.assertEqual((result.created, result.failed), (1, 2))
+        self.assertEqual(result.errors, [
+            RowError(2, {'__all__': [NOT_UTF8]}),
+            RowError(3, {'title': [NOT_STRING]}),
+        ])
+
+    def test_import_csv_not_in_utf8(self):
+        upload = SimpleUploadedFile(
+            'notes.csv', 'title,text,slug\nПокупки,Хлеб,\n'.encode('cp1251')
+        )
+        response = self.author_client.post(
+            self.IMPORT_URL, {'file': upload, 'format': 'csv'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        result = response.context['result']
+        self.assertEqual((result.created, result.failed), (0, 1))
+        self.assertEqual(result.errors[0].line, 2)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as file:
+            file.write(self.ndjson({'title': 'Из файла', 'text': 'Текст'}))
+            file.flush()
+            call_command(
+                'import_notes', file.name, author=self.USERNAME_AUTHOR,
+                stdout=io.StringIO(),
+            )
+        self.assertTrue(
+            Note.objects.filter(author=self.author, title='Из файла').exists()
+        )
+
+    def test_export_streams_own_notes(self):
+        for format in ('ndjson', 'csv'):
+            with self.subTest(format=format):
+                response = self.author_client.get(
+                    self.EXPORT_URL, {'format': format}
+                )
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                if format == 'csv':
+                    rows = list(csv.DictReader(io.StringIO(content)))
+                else:
+                    rows = [json.loads(line) for line in content.splitlines()]
+                self.assertEqual(rows, [
+                    {'title': self.TITLE, 'text': self.TEXT, 'slug': self.SLUG}
+                ])
+
+    def test_export_round_trip(self):
+        response = self.author_client.get(self.EXPORT_URL)
+        content = b''.join(response.streaming_content)
+        Note.objects.filter(author=self.author).delete()
+        result = import_notes(io.BytesIO(content), 'ndjson', self.author)
+        self.assertEqual(result.created, 1)
+        self.assertTrue(Note.objects.filter(slug=self.SLUG).exists())
+
+
+class SeedNotesTests(TestCase):
+    def test_seed_notes_unique_slugs(self):
+        # Только частые заголовки: slug повторяются и получают суффиксы.
+        with mock.patch(
+            'notes.management.commands.seed_notes.COMMON_SHARE', 1
+        ):
+            call_command(
+                'seed_notes', users=3, notes=60, batch_size=25,
+                stdout=io.StringIO(),
+            )
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), 60)
+        self.assertEqual(len(set(slugs)), 60)
+        self.assertIn(f'{cached_slugify("Список покупок")}-2', slugs)
+
+    def test_seed_notes_prefix_guard(self):
+        User.objects.create_user(username='seeder')
+        call_command('seed_notes', users=1, notes=1, stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command(
+                'seed_notes', users=1, notes=1, stdout=io.StringIO()
+            )
+
+
+@override_settings(
+    ROOT_URLCONF='yanote.async_urls', REQUEST_BUDGETS_STRICT=True
+)
+class AsyncViewsTests(TransactionTestCase):
+    # Обработчики идут в пуле потоков со своими соединениями
+    # и видят только закоммиченные данные.
+    def setUp(self):
+        BaseTest.setUpTestData.__func__(type(self))
+
+    async def test_async_list_and_detail(self):
+        await sync_to_async(self.async_client.force_login)(self.author)
+        response = await self.async_client.get(self.LIST_URL)
+        self.assertIs(
+            response.resolver_match.func.view_class, async_views.NotesList
+        )
+        self.assertContains(response, self.TITLE)
+        self.assertNotContains(response, self.TITLE_OTHER)
+        response = await self.async_client.get(self.DETAIL_URL)
+        self.assertContains(response, self.TEXT)
+        self.assertTrue(response.has_header('ETag'))
+
+    async def test_async_views_require_login(self):
+        response = await self.async_client.get(self.DETAIL_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
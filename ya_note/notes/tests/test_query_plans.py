@@ -0,0 +1,40 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base_tests import BaseTest
+
+
+class QueryPlanTests(BaseTest):
+    def query_plans(self, client, url):
+        """Планы запросов SQLite для всех SELECT, выполненных страницей."""
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans[query['sql']] = [row[-1] for row in cursor.fetchall()]
+        return plans
+
+    def assert_index_backed(self, plans):
+        for sql, plan in plans.items():
+            for step in plan:
+                self.assertNotIn(
+                    'TEMP B-TREE', step,
+                    f'Запрос сортирует во временном B-дереве: {sql}'
+                )
+                self.assertFalse(
+                    step.startswith('SCAN') and 'INDEX' not in step,
+                    f'Запрос читает таблицу целиком: {sql}\n{plan}'
+                )
+
+    def test_index_backed_pages(self):
+        for url in (
+            self.LIST_URL, self.LIST_JSON_URL, self.DETAIL_URL, self.EDIT_URL
+        ):
+            with self.subTest(url=url):
+                self.assert_index_backed(
+                    self.query_plans(self.author_client, url)
+                )
@@ -1,5 +1,7 @@
 from .base_tests import BaseTest
+from django.test import override_settings
 from http import HTTPStatus
+from yanote.metrics import BudgetExceeded
 
 
 class RoutesTests(BaseTest):
@@ -62,3 +64,25 @@ class RoutesTests(BaseTest):
                 response = self.anonymous_client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.FOUND)
                 self.assertRedirects(response, f"{self.LOGIN_URL}?next={url}")
+
+
+class MetricsTests(BaseTest):
+    def test_metrics_page_for_staff_only(self):
+        self.author_client.get(self.LIST_URL)
+        response = self.author_client.get(self.METRICS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.author.is_staff = True
+        self.author.save()
+        response = self.author_client.get(self.METRICS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('queries', response.json()['notes:list'])
+
+    def test_query_budget_exceeded(self):
+        with override_settings(
+            REQUEST_BUDGETS={'notes:list': {'queries': 0}}
+        ):
+            with self.assertRaises(BudgetExceeded):
+                self.author_client.get(self.LIST_URL)
+            with override_settings(REQUEST_BUDGETS_STRICT=False):
+                with self.assertLogs('yanote.metrics', 'WARNING'):
+                    self.author_client.get(self.LIST_URL)
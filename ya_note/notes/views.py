@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
+from django.db import IntegrityError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.views import generic
 
-from .forms import NoteForm
+from .bulk import CONTENT_TYPES, export_notes, import_notes
+from .forms import WARNING, ImportForm, NoteForm
 from .models import Note
+from .search import search_notes
+from .transactions import atomic_write
 
 
 class Home(generic.TemplateView):
@@ -25,6 +33,15 @@ class NoteBase(LoginRequiredMixin):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
+    def form_valid(self, form):
+        """Slug мог занять параллельный запрос после проверки в форме."""
+        try:
+            with atomic_write():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.cleaned_data['slug'] + WARNING)
+            return self.form_invalid(form)
+
 
 class NoteCreate(NoteBase, generic.CreateView):
     """Добавление заметки."""
@@ -32,9 +49,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -53,7 +68,110 @@ class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PER_PAGE
+
+    def get_queryset(self):
+        """Для списка хватает заголовка и slug, текст не загружаем."""
+        return super().get_queryset().only('title', 'slug').order_by('id')
+
+
+class NotesListJson(NotesList):
+    """Страница списка заметок в JSON."""
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page_obj']
+        return JsonResponse({
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'next': page.next_page_number() if page.has_next() else None,
+            'previous': (
+                page.previous_page_number() if page.has_previous() else None
+            ),
+            'results': [
+                {
+                    'id': note.id,
+                    'title': note.title,
+                    'slug': note.slug,
+                    'url': reverse('notes:detail', args=[note.slug]),
+                }
+                for note in page.object_list
+            ],
+        }, **response_kwargs)
+
 
 class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+    """Заметка подробно.
+
+    Неизменившаяся заметка отдаётся ответом 304 без рендеринга.
+    """
     template_name = 'notes/detail.html'
+
+    def get(self, request, *args, **kwargs):
+        """Валидаторы считаются по той же заметке, что попадёт в шаблон."""
+        self.object = self.get_object()
+        updated_at = self.object.updated_at
+        etag = quote_etag(f'{self.object.pk}-{updated_at.timestamp()}')
+        last_modified = int(updated_at.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.render_to_response(
+                self.get_context_data(object=self.object)
+            )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по своим заметкам."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user,
+            self.request.GET.get('q', ''),
+            settings.NOTES_PER_PAGE,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteImport(NoteBase, generic.FormView):
+    """Импорт заметок из файла NDJSON или CSV."""
+    template_name = 'notes/import.html'
+    form_class = ImportForm
+
+    def form_valid(self, form):
+        """Пачки вставляются в своих транзакциях, общей не открываем."""
+        result = import_notes(
+            form.cleaned_data['file'],
+            form.cleaned_data['format'],
+            self.request.user,
+        )
+        return self.render_to_response(
+            self.get_context_data(form=form, result=result)
+        )
+
+
+class NoteExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя потоком."""
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get('format', 'ndjson')
+        if file_format not in CONTENT_TYPES:
+            raise Http404('Неизвестный формат.')
+        response = StreamingHttpResponse(
+            export_notes(self.get_queryset(), file_format),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{file_format}"'
+        )
+        return response
@@ -0,0 +1,12 @@
+"""URL проекта с асинхронными страницами чтения.
+
+Для запуска под ASGI: ROOT_URLCONF = 'yanote.async_urls'.
+"""
+from django.urls import include, path
+
+from yanote import urls
+
+urlpatterns = [path('', include('notes.async_urls'))] + [
+    pattern for pattern in urls.urlpatterns
+    if getattr(pattern, 'app_name', None) != 'notes'
+]
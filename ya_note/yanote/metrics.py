@@ -0,0 +1,234 @@
+"""Метрики запросов по именам URL.
+
+Для каждого запроса считаются число SQL-запросов, время в БД,
+время рендеринга шаблона и полное время ответа. Значения копятся
+в гистограммах внутри процесса и отдаются страницей ``/metrics/``.
+Бюджеты из ``REQUEST_BUDGETS`` проверяются после каждого ответа:
+превышение пишется в лог, а при ``REQUEST_BUDGETS_STRICT``
+(включается в тестах) приводит к исключению.
+
+Под ASGI синхронные части запросов выполняются вперемешку в общем
+потоке Django 3.2 и в пуле потоков асинхронных представлений, поэтому
+счётчик запроса не ставится обёрткой на соединение, а лежит
+в contextvar: единственная обёртка count_query берёт его из контекста,
+который sync_to_async переносит в поток.
+
+Рендеринг засекает шаблонизатор TimedDjangoTemplates (подключается
+в TEMPLATES): так учитываются и TemplateResponse, и render_to_string,
+например закэшированная главная и фрагменты комментариев. Вложенные
+рендеры не считаются повторно.
+"""
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise
+)
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class BudgetExceeded(AssertionError):
+    """Представление вышло за бюджет из REQUEST_BUDGETS."""
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(BUCKETS + ('+Inf',), self.buckets):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'max': round(self.max, 3),
+            'buckets': buckets,
+        }
+
+
+class Registry:
+    """Гистограммы метрик по именам URL, общие для потоков процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view_name, sample):
+        with self._lock:
+            histograms = self._views.setdefault(view_name, {})
+            for metric, value in sample.items():
+                histograms.setdefault(metric, Histogram()).observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: {
+                    metric: histogram.as_dict()
+                    for metric, histogram in histograms.items()
+                }
+                for view_name, histograms in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
+
+_timer = ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    """Счётчик запросов, времени в БД и в шаблонах для одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0
+        self.template_duration = 0
+        self.rendering = False
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.duration += time.perf_counter() - start
+
+
+def count_query(execute, sql, params, many, context):
+    """Обёртка execute_wrapper: передаёт запрос счётчику из контекста."""
+    timer = _timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+class TimedTemplate(Template):
+    """Шаблон, время рендеринга которого идёт в метрики запроса."""
+
+    def render(self, context=None, request=None):
+        timer = _timer.get()
+        if timer is None or timer.rendering:
+            return super().render(context, request)
+        timer.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer.rendering = False
+            timer.template_duration += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, отдающий шаблоны TimedTemplate."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def install_counter():
+    """Ставит count_query на соединения текущего потока, один раз."""
+    for connection in connections.all():
+        if count_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(count_query)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        install_counter()
+        timer = RequestTimer()
+        token = _timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.observe(request, response, timer)
+
+    async def __acall__(self, request):
+        await sync_to_async(install_counter)()
+        timer = RequestTimer()
+        token = _timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.observe(request, response, timer)
+
+    def observe(self, request, response, timer):
+        wall_time = time.perf_counter() - timer.started
+        match = request.resolver_match
+        if match is None:
+            return response
+        sample = {
+            'queries': timer.queries,
+            'db_ms': timer.duration * 1000,
+            'template_ms': timer.template_duration * 1000,
+            'wall_ms': wall_time * 1000,
+        }
+        registry.observe(match.view_name, sample)
+        self.check_budget(match.view_name, sample)
+        return response
+
+    def check_budget(self, view_name, sample):
+        budget = settings.REQUEST_BUDGETS.get(view_name, {})
+        for metric, limit in budget.items():
+            if sample[metric] <= limit:
+                continue
+            message = (
+                f'{view_name}: {metric}={sample[metric]:.0f} '
+                f'превышает бюджет {limit}'
+            )
+            if settings.REQUEST_BUDGETS_STRICT:
+                raise BudgetExceeded(message)
+            logger.warning(message)
+
+
+@staff_member_required
+def metrics_view(request):
+    """Текущие гистограммы процесса в JSON."""
+    return JsonResponse(registry.snapshot())
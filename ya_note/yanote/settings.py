@@ -22,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.metrics.RequestMetricsMiddleware',
+    'yanote.routers.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -31,11 +33,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Под ASGI: 'yanote.async_urls' — асинхронные страницы чтения.
 ROOT_URLCONF = 'yanote.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yanote.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -52,13 +55,44 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+# Прагмы SQLite для нескольких воркеров, см. yanote/sqlite.py.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,  # в КиБ, 20 МиБ на соединение
+    'mmap_size': 268435456,  # 256 МиБ
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения — алиасы из DATABASES. Локально реплику
+# можно сделать копией основной базы (manage.py sync_replicas):
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': BASE_DIR / 'replica.sqlite3',
+#     'PRAGMAS': SQLITE_PRAGMAS,
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+
+# Приложения, модели которых читаются с реплик.
+DATABASE_REPLICA_APPS = ('notes',)
+
+# Сколько секунд после своей записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS = 10
+
+DATABASE_ROUTERS = ['yanote.routers.ReplicaRouter']
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +121,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PER_PAGE = 50
+
+# Бюджеты на один запрос по имени URL: queries, db_ms, template_ms, wall_ms.
+REQUEST_BUDGETS = {
+    'notes:list': {'queries': 4},
+    'notes:list_json': {'queries': 4},
+    'notes:search': {'queries': 3},
+    # Сами заметки выгрузка читает при отдаче ответа, уже после middleware.
+    'notes:export': {'queries': 2},
+    'notes:detail': {'queries': 4},
+    'notes:add': {'queries': 8},
+    'notes:edit': {'queries': 8},
+    'notes:delete': {'queries': 4},
+}
+
+REQUEST_BUDGETS_STRICT = False
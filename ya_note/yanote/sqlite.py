@@ -0,0 +1,28 @@
+"""Профиль SQLite для нескольких процессов.
+
+Прагмы из ключа PRAGMAS настроек базы выполняются на каждом новом
+соединении: кроме journal_mode, они действуют только в пределах
+соединения. В режиме WAL читатели не ждут писателя, а
+synchronous=NORMAL в нём не теряет данные при падении процесса, только
+при отключении питания. busy_timeout заставляет писателя ждать
+блокировку, а не сразу получать «database is locked». Вместе
+с CONN_MAX_AGE соединение и его прагмы живут дольше одного запроса.
+"""
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Курсор драйвера: настройка соединения не попадает в execute_wrappers
+    # и не считается запросами страницы, открывшей соединение.
+    cursor = connection.connection.cursor()
+    try:
+        for pragma, value in connection.settings_dict.get(
+            'PRAGMAS', {}
+        ).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    finally:
+        cursor.close()